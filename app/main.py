@@ -5,13 +5,20 @@ Sebagai pintu masuk untuk menjalankan seluruh sistem IR (UTS STKI).
 """
 
 import os
+import json
 import subprocess
 import sys
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
 
 # Tentukan path ke folder src/
 BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 SRC_PATH = os.path.join(BASE_PATH, "src")
 
+# Server pencarian (python src/server.py); jika tidak aktif, menu kembali menjalankan script lokal
+SERVER_URL = os.environ.get("HMNS_SERVER", "http://127.0.0.1:8765")
+
 def clear_screen():
     # Membersihkan layar terminal (Windows & Mac/Linux)
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -32,16 +39,18 @@ def main_menu():
 
         choice = input("Pilih menu [0-5]: ").strip()
 
+        online = server_available()
+
         if choice == "1":
-            run_script("preprocess.py")
+            run_script("preprocess.py", reload_server=online)
         elif choice == "2":
-            run_script("search.py", "2")
+            boolean_client() if online else run_script("search.py", "2")
         elif choice == "3":
-            run_script("search.py", "3")
+            vsm_client() if online else run_script("search.py", "3")
         elif choice == "4":
-            run_script("search.py", "4")
+            evaluation_client() if online else run_script("search.py", "4")
         elif choice == "5":
-            run_script("search.py", "5")
+            analyze_client() if online else run_script("search.py", "5")
         elif choice == "0":
             print("\nTerima kasih, sampai jumpa!")
             break
@@ -49,7 +58,116 @@ def main_menu():
             print("\nPilihan tidak valid.")
             input("Tekan Enter untuk lanjut...")
 
-def run_script(script_name, mode=None):
+# -------------------------------------------------
+# Klien tipis untuk server pencarian
+# -------------------------------------------------
+class ServerError(Exception):
+    """Server membalas dengan status error (4xx/5xx) atau tidak bisa dihubungi"""
+
+def call_server(path, params=None, method="GET", timeout=10):
+    url = SERVER_URL + path
+    data = None
+    if method == "GET" and params:
+        url += "?" + urlencode(params)
+    elif params is not None:
+        data = json.dumps(params).encode('utf-8')
+    req = Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+    except HTTPError as e:
+        # server mengirim pesan error dalam JSON: {"error": "..."}
+        try:
+            message = json.loads(e.read().decode('utf-8')).get("error", e.reason)
+        except (ValueError, OSError, AttributeError):
+            message = e.reason
+        raise ServerError(f"{message} (HTTP {e.code})")
+    except (URLError, OSError) as e:
+        raise ServerError(f"server tidak bisa dihubungi: {getattr(e, 'reason', e)}")
+
+def server_available():
+    try:
+        return call_server("/health", timeout=0.5).get("status") == "ok"
+    except (ServerError, ValueError):
+        return False
+
+def boolean_client():
+    print("\nMODE: BOOLEAN RETRIEVAL (server)")
+    while True:
+        query = input("\nMasukkan query (gunakan AND/OR/NOT, ketik 'exit' untuk kembali): ").lower()
+        if query == "exit":
+            break
+        if not query.strip():
+            continue
+        try:
+            results = call_server("/boolean", {"q": query})["results"]
+        except ServerError as e:
+            print(f"Gagal: {e}")
+            continue
+        if results:
+            print(f"Dokumen cocok: {results}")
+        else:
+            print("Tidak ada dokumen yang cocok dengan query.")
+
+def vsm_client():
+    print("\nMODE: VECTOR SPACE MODEL (TF-IDF) (server)")
+    while True:
+        query = input("\nMasukkan query pencarian (ketik 'exit' untuk kembali): ").lower()
+        if query == "exit":
+            break
+        if not query.strip():
+            continue
+        try:
+            response = call_server("/vsm", {"q": query, "k": 5})
+        except ServerError as e:
+            print(f"Gagal: {e}")
+            continue
+        results = response["results"]
+        for term, matches in response.get("corrections", {}).items():
+            print(f"Term '{term}' tidak ada di indeks, dicari sebagai: {', '.join(matches)}")
+        print("\nHasil Ranking (Cosine Similarity):")
+        for item in results:
+            if item["score"] > 0:
+                print(f"{item['doc']:10s} → skor: {item['score']:.4f}")
+        print("-" * 40)
+
+def evaluation_client():
+    print("\nMODE: EVALUASI SISTEM (server)")
+    query = input("Masukkan query evaluasi: ").lower()
+    relevan = input("Masukkan dokumen relevan (pisahkan dengan koma, contoh: doc6,doc1): ")
+    try:
+        res = call_server("/evaluate", {"query": query, "relevant": relevan}, method="POST")
+    except ServerError as e:
+        print(f"Gagal: {e}")
+        input("\nTekan Enter untuk kembali ke menu utama...")
+        return
+    print(f"\nQuery: {res['query']}")
+    print(f"Dokumen relevan (ground truth): {res['relevant']}")
+    print(f"Dokumen ditemukan: {res['retrieved']}")
+    print(f"Precision = {res['precision']:.2f}")
+    print(f"Recall    = {res['recall']:.2f}")
+    print(f"F1-score  = {res['f1']:.2f}")
+    input("\nTekan Enter untuk kembali ke menu utama...")
+
+def analyze_client():
+    print("\nMODE: ANALISIS HASIL EVALUASI OTOMATIS (server)\n")
+    try:
+        rows = call_server("/evaluate", {}, method="POST")["results"]
+    except ServerError as e:
+        print(f"Gagal: {e}")
+        input("\nTekan Enter untuk kembali ke menu utama...")
+        return
+    print(f"{'Query':35s} | {'Precision':>10} | {'Recall':>10} | {'F1-score':>10}")
+    print("-" * 75)
+    for row in rows:
+        print(f"{row['query']:35s} | {row['precision']:10.2f} | {row['recall']:10.2f} | {row['f1']:10.2f}")
+    n = len(rows) or 1
+    print("-" * 75)
+    print(f"{'Rata-rata':35s} | {sum(r['precision'] for r in rows)/n:10.2f} | "
+          f"{sum(r['recall'] for r in rows)/n:10.2f} | {sum(r['f1'] for r in rows)/n:10.2f}")
+    input("\nTekan Enter untuk kembali ke menu utama...")
+
+def run_script(script_name, mode=None, reload_server=False):
     """Menjalankan script Python dari folder src."""
     script_path = os.path.join(SRC_PATH, script_name)
 
@@ -66,6 +184,13 @@ def run_script(script_name, mode=None):
         subprocess.run(cmd)
     except KeyboardInterrupt:
         print("\nProses dibatalkan oleh pengguna.")
+    if reload_server:
+        # server memuat ulang indeks hasil preprocessing terbaru
+        try:
+            info = call_server("/reload", {}, method="POST", timeout=60)
+            print(f"Server memuat ulang indeks (generasi {info['generation']}).")
+        except ServerError as e:
+            print(f"Server gagal memuat ulang indeks: {e}")
     input("\nTekan Enter untuk kembali ke menu utama...")
 
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_PATH = os.path.join(BASE_PATH, "src")
+sys.path.insert(0, SRC_PATH)
+
+from synthetic_corpus import CorpusGenerator, DEFAULT_DOCS, DEFAULT_VOCAB, DEFAULT_ZIPF  # noqa: E402
+import instrument  # noqa: E402
+from index_store import build_index_file  # noqa: E402
+from boolean_ir import build_inverted_index, load_inverted_index, eval_boolean_query, BitmapIndex  # noqa: E402
+from vsm_ir import load_documents, build_vocabulary, compute_tfidf, TfidfIndex  # noqa: E402
+from shard_index import build_shards, ShardedIndex  # noqa: E402
+from query_analyzer import get_analyzer  # noqa: E402
+from batch_eval import percentile  # noqa: E402
+
+DEFAULT_QUERIES = 200
+WARMUP_QUERIES = 10
+REGRESSION_THRESHOLD = 1.2  # lebih lambat 20% dari baseline dianggap regresi
+
+
+# ------------------------------
+# Pengukuran
+# ------------------------------
+def measure_build(func, track_memory=True):
+    """Jalankan func sekali untuk waktu, sekali lagi di bawah tracemalloc untuk puncak memori"""
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if track_memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, {"seconds": round(seconds, 6), "peak_bytes": peak}
+
+
+def measure_queries(func, queries):
+    """Latensi per query (ms) -> p50/p95/p99/mean/max"""
+    for query in queries[:WARMUP_QUERIES]:
+        func(query)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "queries": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p95_ms": round(percentile(latencies, 95), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mean_ms": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 4) if latencies else 0.0,
+    }
+
+
+# ------------------------------
+# Satu ukuran korpus
+# ------------------------------
+def run_size(n_docs, vocab_size, zipf, n_queries, seed, workdir, track_memory=True, n_shards=0):
+    processed_dir = os.path.join(workdir, f"processed_{n_docs}")
+    index_path = os.path.join(workdir, f"index_{n_docs}", "inverted.idx")
+    shutil.rmtree(processed_dir, ignore_errors=True)
+    shutil.rmtree(os.path.dirname(index_path), ignore_errors=True)
+
+    gen = CorpusGenerator(vocab_size=vocab_size, zipf=zipf, seed=seed)
+    start = time.perf_counter()
+    n_tokens = gen.write_corpus(n_docs, processed_dir)
+    generate_seconds = time.perf_counter() - start
+
+    build = {}
+    _, build["build_inverted_index"] = measure_build(
+        lambda: build_inverted_index(processed_dir), track_memory)
+
+    def legacy_tfidf():
+        docs = load_documents(processed_dir)
+        vocab, df = build_vocabulary(docs)
+        return compute_tfidf(docs, vocab, df)
+    _, build["compute_tfidf"] = measure_build(legacy_tfidf, track_memory)
+
+    _, build["index_file"] = measure_build(
+        lambda: build_index_file(processed_dir, index_path), track_memory)
+    index_bytes = os.path.getsize(index_path)
+
+    def load_boolean():
+        inverted_index, all_docs = load_inverted_index(index_path, processed_dir)
+        return BitmapIndex(inverted_index, all_docs), all_docs
+    (bitmap_index, all_docs), build["boolean_load"] = measure_build(load_boolean, track_memory)
+    tfidf, build["vsm_load"] = measure_build(
+        lambda: TfidfIndex.from_index_file(index_path, processed_dir), track_memory)
+    # normalisasi query sama dengan shard (dan get_engine), supaya latensi tunggal vs sharded sebanding
+    analyzer = get_analyzer(index_path)
+    tfidf.analyzer = analyzer
+
+    boolean_queries = gen.boolean_queries(n_queries)
+    vsm_queries = gen.vsm_queries(n_queries)
+    mixed_queries = gen.mixed_queries(n_queries)
+    query = {
+        "boolean": measure_queries(lambda q: eval_boolean_query(q, bitmap_index, all_docs, analyzer),
+                                   boolean_queries),
+        "vsm_top5": measure_queries(lambda q: tfidf.search(q, k=5), vsm_queries),
+        "vsm_top5_exhaustive": measure_queries(
+            lambda q: tfidf.exhaustive_top_k(tfidf.query_vector(q), 5), vsm_queries),
+        # term umum + term jarang: kasus tempat pruning MaxScore melewati hampir semua postings term umum
+        "vsm_top5_mixed": measure_queries(lambda q: tfidf.search(q, k=5), mixed_queries),
+        "vsm_top5_mixed_exhaustive": measure_queries(
+            lambda q: tfidf.exhaustive_top_k(tfidf.query_vector(q), 5), mixed_queries),
+        "vsm_full": measure_queries(lambda q: tfidf.search(q), vsm_queries),
+    }
+
+    if n_shards:
+        shard_dir = os.path.join(os.path.dirname(index_path), "shards")
+        _, build["shards"] = measure_build(
+            lambda: build_shards(processed_dir, shard_dir, n_shards, index_path=index_path), track_memory)
+        sharded = ShardedIndex(shard_dir, index_path=index_path, processed_dir=processed_dir)
+        try:
+            query["boolean_sharded"] = measure_queries(sharded.boolean, boolean_queries)
+            query["vsm_top5_sharded"] = measure_queries(lambda q: sharded.search(q, k=5), vsm_queries)
+        finally:
+            sharded.close()
+
+    run = {
+        "docs": n_docs,
+        "shards": n_shards,
+        "vocab_size": vocab_size,
+        "zipf": zipf,
+        "tokens": n_tokens,
+        "terms": len(tfidf.vocab),
+        "generate_seconds": round(generate_seconds, 6),
+        "index_bytes": index_bytes,
+        "build": build,
+        "query": query,
+    }
+    if instrument.ENABLED:
+        run["stages"] = instrument.snapshot()
+        instrument.reset()
+    return run
+
+
+# ------------------------------
+# Perbandingan dengan hasil sebelumnya
+# ------------------------------
+def iter_metrics(run):
+    for stage, values in run["build"].items():
+        yield f"build.{stage}.seconds", values["seconds"]
+        if values.get("peak_bytes") is not None:
+            yield f"build.{stage}.peak_bytes", values["peak_bytes"]
+    yield "index_bytes", run["index_bytes"]
+    for mode, values in run["query"].items():
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            yield f"query.{mode}.{key}", values[key]
+
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Cetak rasio terhadap baseline; kembalikan daftar metrik yang melewati ambang regresi"""
+    old_runs = {run["docs"]: run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in report["runs"]:
+        old = old_runs.get(run["docs"])
+        if old is None:
+            print(f"[{run['docs']} dokumen] tidak ada di baseline, dilewati")
+            continue
+        old_metrics = dict(iter_metrics(old))
+        print(f"\n[{run['docs']} dokumen] dibandingkan dengan baseline")
+        for name, value in iter_metrics(run):
+            before = old_metrics.get(name)
+            if not before:
+                continue
+            ratio = value / before
+            flag = "  <-- REGRESI" if ratio > threshold else ""
+            print(f"  {name:<40} {before:>14.4f} -> {value:>14.4f}  x{ratio:.2f}{flag}")
+            if flag:
+                regressions.append((run["docs"], name, ratio))
+    return regressions
+
+
+def print_summary(run):
+    print(f"\n=== {run['docs']} dokumen | {run['terms']} term | {run['tokens']} token ===")
+    print(f"Ukuran file indeks: {run['index_bytes'] / 1024:.1f} KB")
+    for stage, values in run["build"].items():
+        peak = values["peak_bytes"]
+        peak_text = f"{peak / (1024 * 1024):8.2f} MB" if peak is not None else "       -"
+        print(f"  build {stage:<22} {values['seconds'] * 1000:10.2f} ms  puncak {peak_text}")
+    for mode, values in run["query"].items():
+        print(f"  query {mode:<26} p50 {values['p50_ms']:.3f} ms | p95 {values['p95_ms']:.3f} ms"
+              f" | p99 {values['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark indeks & latensi query pada korpus parfum sintetis")
+    parser.add_argument("--docs", type=int, nargs='+', default=[DEFAULT_DOCS],
+                        help="satu atau beberapa ukuran korpus (jumlah dokumen)")
+    parser.add_argument("--vocab", type=int, default=DEFAULT_VOCAB, help="ukuran kosakata")
+    parser.add_argument("--zipf", type=float, default=DEFAULT_ZIPF, help="kemiringan distribusi Zipf")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="jumlah query per mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="folder kerja korpus & indeks (default: folder sementara)")
+    parser.add_argument("--no-memory", action="store_true", help="lewati pengukuran puncak memori")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="ukur juga query scatter-gather pada indeks dengan N shard (satu proses per shard)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="sertakan metrik per tahap (instrument.py) di hasil JSON")
+    parser.add_argument("--output", help="simpan hasil sebagai JSON")
+    parser.add_argument("--compare", help="JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="rasio terhadap baseline yang dianggap regresi")
+    args = parser.parse_args()
+
+    if args.instrument:
+        instrument.enable()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="hmns-bench-")
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "vocab_size": args.vocab,
+            "zipf": args.zipf,
+            "queries": args.queries,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+    try:
+        for n_docs in args.docs:
+            run = run_size(n_docs, args.vocab, args.zipf, args.queries, args.seed,
+                           workdir, track_memory=not args.no_memory, n_shards=args.shards)
+            report["runs"].append(run)
+            print_summary(run)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nHasil disimpan ke {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metrik melewati ambang regresi x{args.threshold:.2f}")
+            sys.exit(1)
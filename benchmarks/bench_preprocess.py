@@ -0,0 +1,82 @@
+
+import os
+import re
+import sys
+import time
+import argparse
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_PATH = os.path.join(BASE_PATH, "src")
+sys.path.insert(0, SRC_PATH)
+
+from preprocess import RAW_DIR, clean_text, preprocess_text, iter_preprocessed, get_stemmer, get_stopwords  # noqa: E402
+
+DEFAULT_ROUNDS = 5
+
+
+def legacy_clean_text(text):
+    """clean_text versi lama (dua re.sub + strip), sebagai pembanding"""
+    text = text.lower()
+    text = re.sub(r'[^a-z\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def load_texts(raw_dir=RAW_DIR, repeat=1):
+    """Teks mentah data/raw; repeat > 1 menyambung tiap dokumen beberapa kali (dokumen lebih panjang)"""
+    texts = []
+    for fname in sorted(os.listdir(raw_dir)):
+        if fname.endswith('.txt'):
+            with open(os.path.join(raw_dir, fname), 'r', encoding='utf-8') as f:
+                texts.append((fname, '\n'.join([f.read()] * repeat)))
+    return texts
+
+
+def best_time(func, texts, rounds):
+    """Waktu tercepat (ms) satu kali memproses semua teks"""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _, text in texts:
+            func(text)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare(name, baseline, candidate, texts, rounds):
+    """Pastikan hasil identik per dokumen, lalu ukur; kembalikan False jika ada yang berbeda"""
+    for fname, text in texts:
+        if baseline(text) != candidate(text):
+            print(f"  {name:<28} BERBEDA pada {fname}")
+            return False
+    before = best_time(baseline, texts, rounds)
+    after = best_time(candidate, texts, rounds)
+    print(f"  {name:<28} {before:10.3f} ms -> {after:10.3f} ms  x{before / after if after else 0:.2f}  (identik)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark tokenizer satu kali scan vs pipeline per tahap")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--repeat", type=int, default=1, help="sambung tiap dokumen N kali")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="ambil waktu tercepat dari N putaran")
+    args = parser.parse_args()
+
+    texts = load_texts(args.raw_dir, args.repeat)
+    n_chars = sum(len(text) for _, text in texts)
+    print(f"{len(texts)} dokumen, {n_chars} karakter, terbaik dari {args.rounds} putaran")
+
+    ok = compare("clean_text", legacy_clean_text, clean_text, texts, args.rounds)
+    try:
+        get_stopwords()
+        get_stemmer()
+    except ImportError:
+        print("  Sastrawi tidak terpasang: perbandingan stopword + stemming dilewati")
+    else:
+        # stemming pertama kali mahal; isi cache dulu supaya kedua versi diukur dalam kondisi sama
+        for _, text in texts:
+            preprocess_text(text)
+        ok &= compare("preprocess_text", preprocess_text, lambda t: list(iter_preprocessed(t)),
+                      texts, args.rounds)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,106 @@
+
+import os
+import random
+from itertools import accumulate, product
+
+
+# kata dasar deskripsi parfum (sudah dalam bentuk hasil preprocessing: huruf kecil, stem, tanpa stopword)
+SEED_TERMS = [
+    "aroma", "cocok", "parfum", "wangi", "segar", "musk", "hadir", "buat", "amber", "woody",
+    "vanilla", "tonjol", "tenang", "rempah", "pria", "padu", "oud", "malam", "lembut", "kuat",
+    "kombinasi", "kesan", "karakter", "hmns", "hari", "hangat", "floral", "elegan", "citrus",
+    "cipta", "campur", "buah", "wibawa", "wanita", "vetiver", "unisex", "tropis", "tidur",
+    "tampil", "tahan", "suasana", "siang", "serenity", "sentuh", "sensual", "sensasi", "semangat",
+    "sandalwood", "rumah", "romantis", "rileks", "rancang", "melati", "mawar", "kopi", "tembakau",
+    "kulit", "lavender", "bergamot", "patchouli", "cedar", "jeruk", "manis", "pedas", "bunga",
+    "kayu", "laut", "hujan", "teh", "kesturi",
+]
+
+SYLLABLES = ["ka", "ra", "wa", "ma", "sa", "ta", "na", "la", "ba", "da", "ga", "pa", "ja",
+             "ri", "si", "ti", "ni", "li", "mi", "ku", "ru", "su", "tu", "nu", "lu", "ng", "an", "ar"]
+
+DEFAULT_DOCS = 1000
+DEFAULT_VOCAB = 5000
+DEFAULT_ZIPF = 1.1
+DEFAULT_MIN_LEN = 20
+DEFAULT_MAX_LEN = 120
+
+
+def build_vocabulary(size, seed=0):
+    """Kosakata sintetis: kata parfum nyata di peringkat atas, sisanya kata buatan dari suku kata"""
+    rng = random.Random(seed)
+    vocab = list(SEED_TERMS[:size])
+    seen = set(vocab)
+    n_syllables = 2
+    while len(vocab) < size:
+        words = [''.join(p) for p in product(SYLLABLES, repeat=n_syllables)]
+        rng.shuffle(words)
+        for word in words:
+            if word not in seen:
+                seen.add(word)
+                vocab.append(word)
+                if len(vocab) == size:
+                    break
+        n_syllables += 1
+    return vocab
+
+
+def zipf_weights(size, skew):
+    """Bobot kumulatif Zipf: peluang term peringkat r sebanding 1 / r^skew"""
+    return list(accumulate(1.0 / (rank ** skew) for rank in range(1, size + 1)))
+
+
+class CorpusGenerator:
+    """Pembangkit korpus deskripsi parfum sintetis dengan distribusi term Zipf (deterministik per seed)"""
+
+    def __init__(self, vocab_size=DEFAULT_VOCAB, zipf=DEFAULT_ZIPF, seed=0,
+                 min_len=DEFAULT_MIN_LEN, max_len=DEFAULT_MAX_LEN):
+        self.vocab = build_vocabulary(vocab_size, seed)
+        self.zipf = zipf
+        self.min_len = min_len
+        self.max_len = max_len
+        self.rng = random.Random(seed)
+        self._cum_weights = zipf_weights(len(self.vocab), zipf)
+
+    def sample_terms(self, k):
+        return self.rng.choices(self.vocab, cum_weights=self._cum_weights, k=k)
+
+    def iter_documents(self, n_docs):
+        """Yield (doc_id, tokens) sebanyak n_docs"""
+        width = len(str(n_docs))
+        for i in range(1, n_docs + 1):
+            length = self.rng.randint(self.min_len, self.max_len)
+            yield f"parfum_{i:0{width}d}", self.sample_terms(length)
+
+    def write_corpus(self, n_docs, processed_dir):
+        """Tulis korpus ke folder dengan format data/processed; kembalikan jumlah token"""
+        os.makedirs(processed_dir, exist_ok=True)
+        n_tokens = 0
+        for doc_id, tokens in self.iter_documents(n_docs):
+            with open(os.path.join(processed_dir, f"{doc_id}.txt"), 'w', encoding='utf-8') as f:
+                f.write(' '.join(tokens))
+            n_tokens += len(tokens)
+        return n_tokens
+
+    def vsm_queries(self, n, min_terms=1, max_terms=4):
+        return [' '.join(self.sample_terms(self.rng.randint(min_terms, max_terms))) for _ in range(n)]
+
+    def mixed_queries(self, n, common=2):
+        """Query campuran: `common` term umum (sampel Zipf) + satu term jarang dari separuh bawah kosakata"""
+        tail = self.vocab[len(self.vocab) // 2:]
+        return [' '.join(self.sample_terms(common) + [self.rng.choice(tail)]) for _ in range(n)]
+
+    def boolean_queries(self, n):
+        """Query Boolean acak: 2-4 term dengan and/or/not, sebagian memakai kurung"""
+        queries = []
+        for _ in range(n):
+            terms = self.sample_terms(self.rng.randint(2, 4))
+            parts = [terms[0]]
+            for term in terms[1:]:
+                op = self.rng.choice(["and", "and", "or", "and not"])
+                parts.append(f"{op} {term}")
+            query = ' '.join(parts)
+            if len(terms) > 2 and self.rng.random() < 0.3:
+                query = f"( {parts[0]} {parts[1]} ) " + ' '.join(parts[2:])
+            queries.append(query)
+        return queries
@@ -1,84 +1,26 @@
 # src/analyze_results.py
 
-import os
-import math
-from collections import Counter
+import time
 
-BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
-
-# ------------------------------
-# Fungsi VSM (dari langkah sebelumnya)
-# ------------------------------
-def load_documents(processed_dir=PROCESSED_DIR):
-    docs = {}
-    for fname in sorted(os.listdir(processed_dir)):
-        if fname.endswith('.txt'):
-            with open(os.path.join(processed_dir, fname), 'r', encoding='utf-8') as f:
-                tokens = f.read().split()
-                docs[fname.replace('.txt', '')] = tokens
-    return docs
-
-def build_vocabulary(docs):
-    vocab = set()
-    df = Counter()
-    for tokens in docs.values():
-        unique_terms = set(tokens)
-        vocab.update(unique_terms)
-        for t in unique_terms:
-            df[t] += 1
-    return sorted(list(vocab)), df
-
-def compute_tfidf(docs, vocab, df):
-    N = len(docs)
-    tfidf = {}
-    for doc_id, tokens in docs.items():
-        tf = Counter(tokens)
-        weights = {}
-        for term in vocab:
-            if term in tf:
-                tf_val = tf[term]
-                idf_val = math.log(N / (1 + df[term]))
-                weights[term] = tf_val * idf_val
-            else:
-                weights[term] = 0
-        tfidf[doc_id] = weights
-    return tfidf
-
-def build_query_vector(query, vocab, df, N):
-    q_tokens = query.lower().split()
-    q_tf = Counter(q_tokens)
-    q_vec = {}
-    for term in vocab:
-        if term in q_tf:
-            idf_val = math.log(N / (1 + df.get(term, 0)))
-            q_vec[term] = q_tf[term] * idf_val
-        else:
-            q_vec[term] = 0
-    return q_vec
-
-def cosine_similarity(vec1, vec2):
-    dot = sum(vec1[t] * vec2[t] for t in vec1)
-    norm1 = math.sqrt(sum(v * v for v in vec1.values()))
-    norm2 = math.sqrt(sum(v * v for v in vec2.values()))
-    if norm1 == 0 or norm2 == 0:
-        return 0
-    return dot / (norm1 * norm2)
-
-def rank_documents(query, docs, vocab, df):
-    N = len(docs)
-    tfidf = compute_tfidf(docs, vocab, df)
-    q_vec = build_query_vector(query, vocab, df, N)
-    scores = {}
-    for doc_id, vec in tfidf.items():
-        scores[doc_id] = cosine_similarity(q_vec, vec)
-    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+# Fungsi VSM (load_documents, compute_tfidf, rank_documents, ...) memakai engine bersama di vsm_ir
+from vsm_ir import (load_documents, build_vocabulary, compute_tfidf, build_query_vector,  # noqa: F401
+                    cosine_similarity, rank_documents, get_engine, WEIGHTINGS)
+# test case dibaca dari data/qrels/test_cases.tsv (lihat batch_eval.load_judgments)
+from batch_eval import (load_test_cases, load_judgments, run_batch, print_batch_summary,
+                        precision_at_k, average_precision)
 
 # ------------------------------
 # Evaluasi Precision, Recall, F1
 # ------------------------------
-def evaluate(query, relevant_docs, docs, vocab, df):
-    ranked_results = rank_documents(query, docs, vocab, df)
+def evaluate(query, relevant_docs, docs, vocab, df, index=None):
+    # index (TfidfIndex) dibangun sekali oleh pemanggil agar tidak dihitung ulang per query
+    if index is not None:
+        ranked_results = index.search(query)
+    else:
+        ranked_results = rank_documents(query, docs, vocab, df)
+    return precision_recall_f1(ranked_results, relevant_docs)
+
+def precision_recall_f1(ranked_results, relevant_docs):
     retrieved_docs = [doc for doc, score in ranked_results if score > 0]
 
     TP = len([d for d in retrieved_docs if d in relevant_docs])
@@ -91,20 +33,72 @@ def evaluate(query, relevant_docs, docs, vocab, df):
 
     return precision, recall, f1
 
+def evaluate_all(test_cases, index):
+    """Evaluasi semua test case; pakai mode matriks (perkalian sparse per batch) jika numpy/scipy ada"""
+    # matriks dibangun sekali per engine (index.matrix), bukan setiap kali dievaluasi
+    queries = [query for query, _ in test_cases]
+    try:
+        ranked_lists = index.matrix.rank_many(queries)
+    except ImportError:
+        ranked_lists = [index.search(query) for query in queries]
+    return [precision_recall_f1(ranked, rel) for ranked, (_, rel) in zip(ranked_lists, test_cases)]
+
+# ------------------------------
+# Perbandingan model ranking (TF-IDF vs BM25, ...)
+# ------------------------------
+COMPARE_K = 3
+COMPARE_REPEAT = 20
+
+def compare_weightings(test_cases, weightings=tuple(WEIGHTINGS), k=COMPARE_K, repeat=COMPARE_REPEAT, **engine_kwargs):
+    """Kualitas (rata-rata P/R/F1, P@k, MAP) serta latensi query tiap skema pembobotan"""
+    rows = []
+    for name in weightings:
+        start = time.perf_counter()
+        index = get_engine(name, **engine_kwargs)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        ranked_lists = [index.search(query) for query, _ in test_cases]
+        scores = [precision_recall_f1(ranked, rel) for ranked, (_, rel) in zip(ranked_lists, test_cases)]
+        retrieved = [[doc for doc, score in ranked if score > 0] for ranked in ranked_lists]
+        p_at_k = [precision_at_k(docs, rel, k) for docs, (_, rel) in zip(retrieved, test_cases)]
+        ap = [average_precision(docs, set(rel)) for docs, (_, rel) in zip(retrieved, test_cases)]
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query, _ in test_cases:
+                index.search(query, k=k)
+        query_ms = (time.perf_counter() - start) * 1000 / (repeat * len(test_cases))
+
+        n = len(test_cases)
+        rows.append({
+            "weighting": name,
+            "precision": sum(p for p, _, _ in scores) / n,
+            "recall": sum(r for _, r, _ in scores) / n,
+            "f1": sum(f for _, _, f in scores) / n,
+            "p_at_k": sum(p_at_k) / n,
+            "map": sum(ap) / n,
+            "k": k,
+            "load_ms": load_ms,
+            "query_ms": query_ms,
+        })
+    return rows
+
+def print_weighting_comparison(rows):
+    k = rows[0]["k"] if rows else COMPARE_K
+    print(f"{'Model':8s} | {'Precision':>10} | {'Recall':>10} | {'F1-score':>10} | {f'P@{k}':>7} | {'MAP':>7} | "
+          f"{'Muat (ms)':>10} | {'Query (ms)':>10}")
+    print("-" * 96)
+    for row in rows:
+        print(f"{row['weighting']:8s} | {row['precision']:10.2f} | {row['recall']:10.2f} | {row['f1']:10.2f} | "
+              f"{row['p_at_k']:7.2f} | {row['map']:7.2f} | {row['load_ms']:10.2f} | {row['query_ms']:10.4f}")
+
 # ------------------------------
 # Main: menjalankan beberapa query
 # ------------------------------
 if __name__ == "__main__":
-    docs = load_documents()
-    vocab, df = build_vocabulary(docs)
+    index = get_engine()
 
-    test_cases = [
-        ("vanilla floral aroma", ["doc6", "doc1"]),
-        ("woody amber warm", ["doc1", "doc3", "doc5"]),
-        ("fresh citrus mint", ["doc3", "doc8"]),
-        ("musk jasmine floral", ["doc2", "doc6", "doc7"]),
-        ("lavender sandalwood calm", ["doc9"])
-    ]
+    test_cases = load_test_cases()
 
     print("Hasil Evaluasi Sistem Pencarian (TF-IDF Cosine Similarity)")
     print("-" * 75)
@@ -113,8 +107,7 @@ if __name__ == "__main__":
 
     total_p, total_r, total_f = 0, 0, 0
 
-    for query, rel in test_cases:
-        p, r, f = evaluate(query, rel, docs, vocab, df)
+    for (query, rel), (p, r, f) in zip(test_cases, evaluate_all(test_cases, index)):
         total_p += p
         total_r += r
         total_f += f
@@ -125,3 +118,10 @@ if __name__ == "__main__":
     avg_f = total_f / len(test_cases)
     print("-" * 75)
     print(f"{'Rata-rata':35s} | {avg_p:10.2f} | {avg_r:10.2f} | {avg_f:10.2f}")
+
+    print("\nPerbandingan Model Ranking (kualitas & latensi)")
+    print("-" * 96)
+    print_weighting_comparison(compare_weightings(test_cases))
+
+    print("\nMetrik Ranking (evaluasi batch)")
+    print_batch_summary(run_batch(load_judgments(), k=5, index=index))
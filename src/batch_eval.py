@@ -0,0 +1,281 @@
+
+import os
+import sys
+import json
+import math
+import time
+import heapq
+from itertools import repeat
+from index_store import INDEX_PATH
+from vsm_ir import PROCESSED_DIR, DEFAULT_WEIGHTING, MATRIX_BATCH, get_engine
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+QRELS_DIR = os.path.join(BASE_PATH, "data", "qrels")
+TEST_CASES_PATH = os.path.join(QRELS_DIR, "test_cases.tsv")
+
+DEFAULT_K = 10
+DEFAULT_DEPTH = 1000  # kedalaman ranking untuk MAP/MRR (seperti trec_eval)
+
+
+# ------------------------------
+# Membaca test case / qrels
+# ------------------------------
+# Format yang didukung:
+#   .json : [{"id": ..., "query": ..., "relevant": [doc, ...] atau {doc: grade}}]
+#   .tsv  : query<TAB>doc1,doc2 (baris diawali # diabaikan)
+#   qrels : format TREC "qid iter doc_id grade", query dari topics_path ("qid<TAB>query")
+def load_judgments(path=TEST_CASES_PATH, topics_path=None):
+    """Baca penilaian relevansi -> list (qid, query, {doc_id: grade})"""
+    if topics_path is not None:
+        return _load_trec(path, topics_path)
+
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        judgments = []
+        for i, item in enumerate(items, 1):
+            relevant = item.get("relevant", [])
+            grades = dict(relevant) if isinstance(relevant, dict) else dict.fromkeys(relevant, 1)
+            judgments.append((str(item.get("id", i)), item["query"], grades))
+        return judgments
+
+    judgments = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            query, _, docs = line.partition('\t')
+            relevant = [d.strip() for d in docs.split(',') if d.strip()]
+            judgments.append((str(len(judgments) + 1), query.strip(), dict.fromkeys(relevant, 1)))
+    return judgments
+
+
+def _load_trec(qrels_path, topics_path):
+    queries = {}
+    with open(topics_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            qid, _, query = line.rstrip('\n').partition('\t')
+            if qid.strip() and not qid.startswith('#'):
+                queries[qid.strip()] = query.strip()
+
+    grades = {qid: {} for qid in queries}
+    with open(qrels_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 4 or parts[0].startswith('#'):
+                continue
+            qid, _, doc_id, grade = parts[:4]
+            if qid in grades and int(grade) > 0:
+                grades[qid][doc_id] = int(grade)
+    return [(qid, queries[qid], grades[qid]) for qid in queries]
+
+
+def load_test_cases(path=TEST_CASES_PATH):
+    """Test case sederhana: list (query, [dokumen relevan])"""
+    return [(query, list(grades)) for _, query, grades in load_judgments(path)]
+
+
+# ------------------------------
+# Metrik ranking (ranked = daftar doc_id berskor > 0, urut skor)
+# ------------------------------
+def precision_at_k(ranked, relevant, k):
+    return len([d for d in ranked[:k] if d in relevant]) / k if k > 0 else 0
+
+def average_precision(ranked, relevant):
+    if not relevant:
+        return 0
+    hits, total = 0, 0
+    for i, doc in enumerate(ranked, 1):
+        if doc in relevant:
+            hits += 1
+            total += hits / i
+    return total / len(relevant)
+
+def reciprocal_rank(ranked, relevant):
+    for i, doc in enumerate(ranked, 1):
+        if doc in relevant:
+            return 1 / i
+    return 0
+
+def ndcg_at_k(ranked, grades, k):
+    dcg = sum((2 ** grades.get(doc, 0) - 1) / math.log2(i + 1) for i, doc in enumerate(ranked[:k], 1))
+    ideal = sorted(grades.values(), reverse=True)[:k]
+    idcg = sum((2 ** g - 1) / math.log2(i + 1) for i, g in enumerate(ideal, 1))
+    return dcg / idcg if idcg > 0 else 0
+
+
+# ------------------------------
+# Eksekusi query paralel
+# ------------------------------
+_worker_index = None
+
+def _init_worker(weighting, index_path, processed_dir):
+    # dengan fork indeks sudah diwarisi dari proses induk; selain itu muat sekali per worker
+    global _worker_index
+    if _worker_index is None:
+        _worker_index = get_engine(weighting, index_path, processed_dir)
+
+def _rank(index, query, depth):
+    # untuk kedalaman besar term-at-a-time + nlargest lebih cepat daripada top-k MaxScore;
+    # seri diurutkan sesuai urutan dokumen, sama seperti TfidfIndex.search
+    start = time.perf_counter()
+    scores = index.score_all(index.query_vector(query))
+    doc_pos = index.doc_pos
+    hits = heapq.nlargest(depth, ((doc, score) for doc, score in scores.items() if score > 0),
+                          key=lambda x: (x[1], -doc_pos[x[0]]))
+    latency_ms = (time.perf_counter() - start) * 1000
+    return [doc for doc, _ in hits], latency_ms
+
+def _rank_chunk(queries, depth):
+    return [_rank(_worker_index, query, depth) for query in queries]
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _rank_matrix(index, queries, depth):
+    # latensi per query = waktu satu batch dibagi jumlah query di batch tersebut
+    matrix = index.matrix
+    results = []
+    for batch in _chunks(queries, MATRIX_BATCH):
+        start = time.perf_counter()
+        ranked_lists = matrix.rank_many(batch, k=depth)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(batch)
+        results.extend(([doc for doc, score in ranked if score > 0], latency_ms) for ranked in ranked_lists)
+    return results
+
+def rank_queries(index, queries, depth=DEFAULT_DEPTH, workers=1, executor="auto",
+                 weighting=DEFAULT_WEIGHTING, index_path=INDEX_PATH, processed_dir=PROCESSED_DIR):
+    """Ranking semua query terhadap satu indeks; kembalikan list ([doc_id], latensi_ms)"""
+    # executor: "matrix" (numpy/scipy, semua query dalam beberapa perkalian sparse),
+    # "process"/"thread" (pool worker), "auto" = matrix jika tersedia, selain itu process
+    if executor in ("auto", "matrix"):
+        try:
+            return _rank_matrix(index, queries, depth)
+        except ImportError:
+            if executor == "matrix":
+                raise
+            executor = "process"
+    if workers <= 1 or len(queries) < 2:
+        return [_rank(index, query, depth) for query in queries]
+
+    global _worker_index
+    chunk_size = max(1, math.ceil(len(queries) / (workers * 4)))
+    if executor == "thread":
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(lambda chunk: [_rank(index, q, depth) for q in chunk], _chunks(queries, chunk_size))
+            return [row for part in parts for row in part]
+
+    from concurrent.futures import ProcessPoolExecutor
+    _worker_index = index  # diwarisi worker saat start method = fork
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(weighting, index_path, processed_dir)) as pool:
+            parts = pool.map(_rank_chunk, _chunks(queries, chunk_size), repeat(depth))
+            return [row for part in parts for row in part]
+    finally:
+        _worker_index = None
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+def run_batch(judgments, k=DEFAULT_K, depth=DEFAULT_DEPTH, workers=1, executor="auto",
+              weighting=DEFAULT_WEIGHTING, index_path=INDEX_PATH, processed_dir=PROCESSED_DIR, index=None):
+    """Evaluasi batch: MAP, nDCG@k, P@k, MRR dan latensi per query"""
+    if index is None:
+        index = get_engine(weighting, index_path, processed_dir)
+    start = time.perf_counter()
+    ranked_lists = rank_queries(index, [query for _, query, _ in judgments], max(depth, k), workers,
+                                executor, weighting, index_path, processed_dir)
+    wall = time.perf_counter() - start
+
+    rows = []
+    for (qid, query, grades), (ranked, latency_ms) in zip(judgments, ranked_lists):
+        relevant = {doc for doc, g in grades.items() if g > 0}
+        rows.append({
+            "id": qid,
+            "query": query,
+            "ap": average_precision(ranked[:depth], relevant),
+            "ndcg": ndcg_at_k(ranked, grades, k),
+            "p_at_k": precision_at_k(ranked, relevant, k),
+            "rr": reciprocal_rank(ranked[:depth], relevant),
+            "retrieved": len(ranked),
+            "latency_ms": latency_ms,
+        })
+
+    n = len(rows) or 1
+    latencies = sorted(row["latency_ms"] for row in rows)
+    summary = {
+        "queries": len(rows),
+        "k": k,
+        "weighting": getattr(index.weighting, "name", weighting),
+        "map": sum(r["ap"] for r in rows) / n,
+        "ndcg_at_k": sum(r["ndcg"] for r in rows) / n,
+        "p_at_k": sum(r["p_at_k"] for r in rows) / n,
+        "mrr": sum(r["rr"] for r in rows) / n,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_mean_ms": sum(latencies) / n,
+        "wall_seconds": wall,
+        "qps": len(rows) / wall if wall > 0 else 0.0,
+    }
+    return {"summary": summary, "queries": rows}
+
+
+def print_batch_summary(result):
+    st = result["summary"]
+    k = st["k"]
+    print(f"Model {st['weighting']} | {st['queries']} query | MAP {st['map']:.4f} | nDCG@{k} {st['ndcg_at_k']:.4f} | "
+          f"P@{k} {st['p_at_k']:.4f} | MRR {st['mrr']:.4f}")
+    print(f"Latensi per query: p50 {st['latency_p50_ms']:.3f} ms | p95 {st['latency_p95_ms']:.3f} ms | "
+          f"rata-rata {st['latency_mean_ms']:.3f} ms | total {st['wall_seconds']:.2f} s ({st['qps']:.0f} query/s)")
+
+
+def print_per_query(result):
+    k = result["summary"]["k"]
+    print(f"{'ID':>5} | {'Query':35s} | {'AP':>6} | {f'nDCG@{k}':>8} | {f'P@{k}':>6} | {'RR':>6} | {'ms':>8}")
+    print("-" * 92)
+    for row in result["queries"]:
+        print(f"{row['id']:>5} | {row['query'][:35]:35s} | {row['ap']:6.3f} | {row['ndcg']:8.3f} | "
+              f"{row['p_at_k']:6.3f} | {row['rr']:6.3f} | {row['latency_ms']:8.3f}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from vsm_ir import WEIGHTINGS
+
+    parser = argparse.ArgumentParser(description="Evaluasi batch: MAP, nDCG@k, P@k, MRR + latensi per query")
+    parser.add_argument("--cases", default=TEST_CASES_PATH,
+                        help="file test case (.tsv/.json) atau qrels TREC (bersama --topics)")
+    parser.add_argument("--topics", help="file topik TREC (qid<TAB>query) untuk --cases berformat qrels")
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="kedalaman ranking untuk MAP/MRR")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--executor", choices=("auto", "matrix", "process", "thread"), default="auto")
+    parser.add_argument("--weighting", choices=tuple(WEIGHTINGS), default=DEFAULT_WEIGHTING)
+    parser.add_argument("--per-query", action="store_true", help="tampilkan metrik tiap query")
+    parser.add_argument("--output", help="simpan hasil lengkap sebagai JSON")
+    args = parser.parse_args()
+
+    judgments = load_judgments(args.cases, args.topics)
+    if not judgments:
+        print(f"Tidak ada test case di {args.cases}")
+        sys.exit(1)
+
+    result = run_batch(judgments, k=args.k, depth=args.depth, workers=args.workers,
+                       executor=args.executor, weighting=args.weighting)
+    if args.per_query:
+        print_per_query(result)
+        print()
+    print_batch_summary(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Hasil disimpan ke {args.output}")
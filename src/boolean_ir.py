@@ -1,13 +1,51 @@
 
 import os
+import re
+import heapq
+from bisect import bisect_left
 from collections import defaultdict
+from collections.abc import Mapping
+import instrument
+from index_store import INDEX_PATH, open_index, encode_positions, decode_positions, token_positions
+from snapshot import resolve_processed_dir
+from term_dict import TermDictionary, is_pattern
 
 
 BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
 
-def build_inverted_index(processed_dir=PROCESSED_DIR):
-    inverted = defaultdict(set)
+# NEAR tanpa jarak (mis. "musk near vanilla") berarti NEAR/5
+DEFAULT_NEAR = 5
+# operand yang (diperkirakan) memuat >= 1/32 koleksi dikerjakan sebagai bitmap, bukan daftar postings
+DENSE_FRACTION = 1 / 32
+
+
+class PositionalIndex(Mapping):
+    """Inverted index di memori: term -> daftar doc_id, posisi token disimpan terkode per posting"""
+
+    def __init__(self, postings):
+        # postings: term -> [(doc_id, posisi_terkode), ...] urut doc_id
+        self._postings = postings
+        self._docs = {term: [doc_id for doc_id, _ in plist] for term, plist in postings.items()}
+
+    def __getitem__(self, term):
+        return self._docs[term]
+
+    def __iter__(self):
+        return iter(self._docs)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def positions(self, term):
+        return self._postings.get(term, [])
+
+
+def build_inverted_index(processed_dir=None):
+    # default: teks hasil preprocessing snapshot aktif (data/processed hanya jika belum ada snapshot)
+    if processed_dir is None:
+        processed_dir = resolve_processed_dir(PROCESSED_DIR, INDEX_PATH)
+    inverted = defaultdict(list)
     doc_ids = []
 
     for fname in sorted(os.listdir(processed_dir)):
@@ -18,20 +56,72 @@ def build_inverted_index(processed_dir=PROCESSED_DIR):
             with open(os.path.join(processed_dir, fname), "r", encoding="utf-8") as f:
                 tokens = f.read().split()
 
-            for term in set(tokens):
-                inverted[term].add(doc_id)
+            for term, positions in token_positions(tokens).items():
+                inverted[term].append((doc_id, encode_positions(positions)))
+
+    for plist in inverted.values():
+        plist.sort()
+    return PositionalIndex(dict(inverted)), sorted(doc_ids)
+
+
+class DiskInvertedIndex(Mapping):
+    """Inverted index (term -> daftar doc_id) yang dibaca dari file indeks biner saat diminta"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.generation = reader.generation
+        self.version = reader.version
+        self._cache = {}
+
+    def __getitem__(self, term):
+        if term not in self._cache:
+            if term not in self.reader:
+                raise KeyError(term)
+            doc_ids = self.reader.doc_ids
+            self._cache[term] = [doc_ids[docno] for docno, _ in self.reader.postings(term)]
+        return self._cache[term]
 
-    inverted = {term: sorted(list(docs)) for term, docs in inverted.items()}
-    return inverted, sorted(doc_ids)
+    def __iter__(self):
+        return iter(self.reader.terms)
+
+    def __len__(self):
+        return len(self.reader.terms)
+
+    def positions(self, term):
+        """[(doc_id, posisi_terkode), ...]; dibaca dari file setiap kali, tidak di-cache"""
+        doc_ids = self.reader.doc_ids
+        return [(doc_ids[docno], raw) for docno, raw in self.reader.positions(term)]
+
+
+def load_inverted_index(index_path=INDEX_PATH, processed_dir=PROCESSED_DIR):
+    reader = open_index(index_path, processed_dir)
+    return DiskInvertedIndex(reader), sorted(reader.doc_ids)
+
+
+_NEAR = re.compile(r'near(?:/(\d+))?$')
+
+
+def near_distance(token):
+    """Jarak k untuk token 'near/k' (atau 'near'), None jika bukan operator NEAR"""
+    m = _NEAR.match(token.lower())
+    if m is None:
+        return None
+    return int(m.group(1)) if m.group(1) else DEFAULT_NEAR
+
+
+def _precedence(token):
+    if near_distance(token) is not None:
+        return 4
+    return {'not': 3, 'and': 2, 'or': 1}.get(token)
 
 
 def infix_to_postfix(tokens):
-    precedence = {'not': 3, 'and': 2, 'or': 1}
     output = []
     stack = []
 
     for t in tokens:
         t = t.lower()
+        prec = _precedence(t)
         if t == '(':
             stack.append(t)
         elif t == ')':
@@ -39,8 +129,8 @@ def infix_to_postfix(tokens):
                 output.append(stack.pop())
             if stack:
                 stack.pop()
-        elif t in precedence:
-            while stack and stack[-1] in precedence and precedence[stack[-1]] >= precedence[t]:
+        elif prec is not None:
+            while stack and stack[-1] != '(' and _precedence(stack[-1]) >= prec:
                 output.append(stack.pop())
             stack.append(t)
         else:
@@ -50,32 +140,137 @@ def infix_to_postfix(tokens):
     return output
 
 
+# posisi bit yang menyala untuk setiap nilai byte, dipakai saat mengubah bitmap ke daftar dokumen
+_BYTE_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+
+
+class BitmapIndex:
+    """Postings sebagai bitmap integer Python: bit ke-i menyala jika dokumen ke-i pada all_docs memuat term"""
+
+    def __init__(self, inverted_index, all_docs, terms=None):
+        # terms: kosakata untuk wildcard/fuzzy (default: term indeks ini; shard memakai kosakata global)
+        self.inverted_index = inverted_index
+        self.doc_ids = list(all_docs)
+        self.doc_pos = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        self.n_bytes = (len(self.doc_ids) + 7) // 8
+        self.all_mask = (1 << len(self.doc_ids)) - 1
+        self._bitmaps = {}
+        self._positions = {}
+        self.has_positions = hasattr(inverted_index, 'positions')
+        self._terms = terms
+        self._term_dict = None
+
+    @property
+    def term_dict(self):
+        """Kamus term (trie) dari kosakata terurut, dibangun saat query wildcard/fuzzy pertama"""
+        if self._term_dict is None:
+            self._term_dict = TermDictionary(sorted(self.inverted_index if self._terms is None else self._terms))
+        return self._term_dict
+
+    def bitmap(self, term):
+        """Bitmap untuk term (dibuat sekali saat pertama diminta)"""
+        bm = self._bitmaps.get(term)
+        if bm is None:
+            buf = bytearray(self.n_bytes)
+            for doc_id in self.inverted_index.get(term, []):
+                i = self.doc_pos[doc_id]
+                buf[i >> 3] |= 1 << (i & 7)
+            bm = int.from_bytes(buf, 'little')
+            self._bitmaps[term] = bm
+        return bm
+
+    def postings(self, term):
+        """Posisi dokumen (urut naik) yang memuat term"""
+        plist = self._positions.get(term)
+        if plist is None:
+            doc_pos = self.doc_pos
+            plist = sorted(doc_pos[doc_id] for doc_id in self.inverted_index.get(term, []))
+            self._positions[term] = plist
+        return plist
+
+    def df(self, term):
+        return len(self.inverted_index.get(term, []))
+
+    def is_dense(self, cost):
+        """True jika hasil sebesar cost lebih murah dikerjakan sebagai bitmap daripada daftar posisi"""
+        return cost > 0 and cost >= len(self.doc_ids) * DENSE_FRACTION
+
+    def bitmap_of(self, positions):
+        """Bitmap dari daftar posisi dokumen"""
+        buf = bytearray(self.n_bytes)
+        for i in positions:
+            buf[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(buf, 'little')
+
+    def positions_of(self, bm):
+        """Posisi dokumen (urut naik) yang bitnya menyala"""
+        result = []
+        for byte_no, b in enumerate(bm.to_bytes(self.n_bytes, 'little')):
+            if b:
+                base = byte_no << 3
+                result.extend(base + i for i in _BYTE_BITS[b])
+        return result
+
+    def term_positions(self, term):
+        """{posisi_dokumen: posisi_token_terkode} untuk term; tidak di-cache agar memori tetap terbatas"""
+        doc_pos = self.doc_pos
+        return {doc_pos[doc_id]: raw for doc_id, raw in self.inverted_index.positions(term)}
+
+    def to_docs(self, bm):
+        """Ubah bitmap menjadi daftar doc_id sesuai urutan all_docs"""
+        doc_ids = self.doc_ids
+        return [doc_ids[i] for i in self.positions_of(bm)]
+
+
+def _check_operands(stack, n, op):
+    # query rusak (mis. 'and vanilla', 'vanilla near/3') -> ValueError, bukan IndexError dari pop()
+    if len(stack) < n:
+        raise ValueError(f"operator '{op}' kekurangan operand")
+
+
 def eval_postfix(postfix, inverted_index, all_docs):
+    # AND/OR/NOT langsung dikerjakan sebagai operasi bitwise pada bitmap
+    if isinstance(inverted_index, BitmapIndex):
+        index = inverted_index
+    else:
+        index = BitmapIndex(inverted_index, all_docs)
     stack = []
-    all_set = set(all_docs)
 
     for t in postfix:
         t = t.lower()
         if t == 'and':
-            b = set(stack.pop())
-            a = set(stack.pop())
-            stack.append(sorted(a & b))
+            _check_operands(stack, 2, t)
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(a & b)
         elif t == 'or':
-            b = set(stack.pop())
-            a = set(stack.pop())
-            stack.append(sorted(a | b))
+            _check_operands(stack, 2, t)
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(a | b)
         elif t == 'not':
-            a = set(stack.pop())
-            stack.append(sorted(all_set - a))
+            _check_operands(stack, 1, t)
+            a = stack.pop()
+            stack.append(index.all_mask & ~a)
+        elif near_distance(t) is not None or t.startswith('"'):
+            # frasa & NEAR butuh posisi: dikerjakan lewat planner
+            raise ValueError("frasa/NEAR hanya didukung oleh eval_boolean_query")
         else:
-            stack.append(inverted_index.get(t, []))
+            stack.append(index.bitmap(t))
+
+    return index.to_docs(stack[-1]) if stack else []
+
 
-    return stack[-1] if stack else []
+_QUERY_TOKEN = re.compile(r'"[^"]*"?|[^\s"]+')
 
 
-def eval_boolean_query(query, inverted_index, all_docs):
+def tokenize_query(query):
     tokens = []
-    for raw in query.strip().split():
+    for raw in _QUERY_TOKEN.findall(query.strip()):
+        if raw.startswith('"'):
+            # frasa dalam tanda kutip tetap satu token: '"white musk"'
+            tokens.append('"' + ' '.join(raw.strip('"').split()) + '"')
+            continue
         # pisahkan tanda kurung jika menempel
         while raw.startswith('('):
             tokens.append('(')
@@ -87,9 +282,393 @@ def eval_boolean_query(query, inverted_index, all_docs):
         if raw:
             tokens.append(raw)
         tokens.extend([')'] * closing)
+    return tokens
+
+
+# ------------------------------
+# Query planner
+# ------------------------------
+class PlanNode:
+    """Simpul rencana query: op = term/phrase/near/and/or/not/andnot, cost = perkiraan jumlah dokumen hasil,
+    dense = dikerjakan sebagai bitmap"""
+
+    def __init__(self, op, children=None, term=None, cost=0, dense=False):
+        self.op = op
+        self.children = children or []
+        self.term = term
+        self.cost = cost
+        self.dense = dense
+
+    def explain(self, depth=0):
+        pad = '  ' * depth
+        mode = " [bitmap]" if self.dense else ""
+        if self.op == 'term':
+            lines = [f"{pad}TERM {self.term!r} (df={self.cost}){mode}"]
+        elif self.op == 'phrase':
+            lines = [f"{pad}PHRASE {' '.join(self.term)!r} (est={self.cost})"]
+        else:
+            label = f"NEAR/{self.term}" if self.op == 'near' else self.op.upper()
+            lines = [f"{pad}{label} (est={self.cost}){mode}"]
+            for child in self.children:
+                lines.extend(child.explain(depth + 1))
+        return lines
+
+
+def build_ast(postfix):
+    """Bangun pohon query dari notasi postfix (AND/OR/NEAR biner, NOT unary, frasa '"a b"')"""
+    stack = []
+    for t in postfix:
+        t = t.lower()
+        k = near_distance(t)
+        if t in ('and', 'or') or k is not None:
+            _check_operands(stack, 2, t)
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(PlanNode('near', [a, b], term=k) if k is not None else PlanNode(t, [a, b]))
+        elif t == 'not':
+            _check_operands(stack, 1, t)
+            stack.append(PlanNode('not', [stack.pop()]))
+        elif t.startswith('"'):
+            terms = tuple(t.strip('"').split())
+            if len(terms) > 1:
+                stack.append(PlanNode('phrase', term=terms))
+            else:
+                stack.append(PlanNode('term', term=terms[0] if terms else ''))
+        else:
+            stack.append(PlanNode('term', term=t))
+    return stack[-1] if stack else None
+
+
+def drop_empty_terms(node):
+    """Buang operand kosong (stopword yang hilang saat normalisasi query) dari pohon query"""
+    if node is None:
+        return None
+    if node.op in ('term', 'phrase'):
+        return node if node.term else None
+    children = [c for c in map(drop_empty_terms, node.children) if c is not None]
+    if not children:
+        return None
+    if node.op != 'not' and len(children) == 1:
+        return children[0]
+    node.children = children
+    return node
+
+
+def expand_term(term, index):
+    """Simpul term; wildcard ('sandal*') dan fuzzy ('vanila~') diperluas jadi OR term kamus"""
+    # term tidak dikenal tidak dikoreksi otomatis: pada query Boolean koreksi diam-diam mengubah hasil
+    # (mis. 'not vanila'); pengguna meminta koreksi secara eksplisit dengan '~'
+    if is_pattern(term):
+        matches = index.term_dict.expand(term)
+        if len(matches) > 1:
+            children = sorted((_term_node(t, index) for t in matches), key=lambda c: c.cost, reverse=True)
+            return _or_node(children, index)
+        if matches:
+            term = matches[0]
+    return _term_node(term, index)
+
+
+def _term_node(term, index):
+    df = index.df(term)
+    return PlanNode('term', term=term, cost=df, dense=index.is_dense(df))
+
+
+def _or_node(children, index):
+    cost = min(len(index.doc_ids), sum(c.cost for c in children))
+    return PlanNode('or', children, cost=cost, dense=index.is_dense(cost))
+
+
+def _flatten(node):
+    """Operand AND/OR n-ary: simpul anak dengan operator yang sama dilebur (sebelum dioptimasi)"""
+    flat = []
+    for child in node.children:
+        flat.extend(_flatten(child) if child.op == node.op else [child])
+    return flat
+
+
+def optimize(node, index):
+    """Ratakan AND/OR n-ary, urutkan operand AND dari df terkecil, ubah 'x and not y' jadi selisih;
+    operand yang padat ditandai supaya dieksekusi sebagai bitmap"""
+    n_docs = len(index.doc_ids)
+    if node.op == 'term':
+        return expand_term(node.term, index)
+    if node.op == 'phrase':
+        node.cost = min(index.df(term) for term in node.term)
+        return node
+
+    if node.op == 'near':
+        children = [optimize(child, index) for child in node.children]
+        if any(child.op not in ('term', 'phrase') for child in children):
+            raise ValueError("operand NEAR harus berupa term atau frasa")
+        return PlanNode('near', children, term=node.term, cost=min(c.cost for c in children))
+    if node.op == 'not':
+        child = optimize(node.children[0], index)
+        if child.op == 'not':
+            return child.children[0]
+        # komplemen hampir selalu padat: NOT murni dikerjakan sebagai bitmap, bukan selisih dari range(N)
+        return PlanNode('not', [child], cost=n_docs - child.cost, dense=True)
+
+    # diratakan sebelum operand dioptimasi: 'a and not b and c' tetap satu AND, bukan ANDNOT di dalam AND
+    flat = []
+    for child in map(lambda c: optimize(c, index), _flatten(node)):
+        flat.extend(child.children if child.op == node.op else [child])
+
+    if node.op == 'or':
+        flat.sort(key=lambda c: c.cost, reverse=True)
+        return _or_node(flat, index)
+
+    positives = []
+    negatives = []
+    for child in flat:
+        if child.op == 'not':
+            negatives.append(child.children[0])
+        elif child.op == 'andnot':
+            # hasil NOT ganda, mis. 'a and not (not (b and not c))'
+            base, excluded = child.children
+            positives.extend(base.children if base.op == 'and' else [base])
+            negatives.append(excluded)
+        else:
+            positives.append(child)
+    positives.sort(key=lambda c: c.cost)
+    if negatives:
+        excluded = negatives[0] if len(negatives) == 1 else _or_node(negatives, index)
+        if not positives:
+            return PlanNode('not', [excluded], cost=n_docs - excluded.cost, dense=True)
+        base = positives[0] if len(positives) == 1 else _and_node(positives, index)
+        return PlanNode('andnot', [base, excluded], cost=base.cost, dense=base.dense)
+    if len(positives) == 1:
+        return positives[0]
+    return _and_node(positives, index)
+
+
+def _and_node(positives, index):
+    # operand terkecil padat -> semua operand padat: AND bitwise; selain itu daftar postings + galloping
+    return PlanNode('and', positives, cost=positives[0].cost, dense=index.is_dense(positives[0].cost))
+
+
+def _gallop(plist, target, lo):
+    """Indeks pertama >= target mulai dari lo, melompat 1, 2, 4, ... lalu binary search"""
+    n = len(plist)
+    hi = lo
+    step = 1
+    while hi < n and plist[hi] < target:
+        lo = hi + 1
+        hi += step
+        step <<= 1
+    return bisect_left(plist, target, lo, min(hi, n))
+
+
+def intersect_postings(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    i = 0
+    for x in a:
+        i = _gallop(b, x, i)
+        if i == len(b):
+            break
+        if b[i] == x:
+            result.append(x)
+    return result
+
+
+def difference_postings(a, b):
+    result = []
+    i = 0
+    for x in a:
+        i = _gallop(b, x, i)
+        if i == len(b) or b[i] != x:
+            result.append(x)
+    return result
+
+
+def union_postings(lists):
+    result = []
+    for x in heapq.merge(*lists):
+        if not result or result[-1] != x:
+            result.append(x)
+    return result
+
+
+# ------------------------------
+# Frasa & NEAR: merge linear daftar posisi
+# ------------------------------
+def _operand_terms(node):
+    return node.term if node.op == 'phrase' else (node.term,)
+
+
+def shifted_intersection(starts, positions, offset):
+    """Posisi awal s pada starts yang juga punya s + offset di positions (keduanya urut naik)"""
+    result = []
+    j = 0
+    n = len(positions)
+    for s in starts:
+        target = s + offset
+        while j < n and positions[j] < target:
+            j += 1
+        if j == n:
+            break
+        if positions[j] == target:
+            result.append(s)
+    return result
+
+
+def within_distance(a, len_a, b, len_b, k):
+    """True jika ada kemunculan a dan b (posisi awal, urut naik) yang berjarak paling jauh k kata"""
+    j = 0
+    n = len(b)
+    for s in a:
+        # b boleh sebelum atau sesudah a: s - k - (len_b - 1) <= posisi b <= s + (len_a - 1) + k
+        lo = s - k - len_b + 1
+        while j < n and b[j] < lo:
+            j += 1
+        if j == n:
+            return False
+        if b[j] <= s + len_a - 1 + k:
+            return True
+    return False
+
+
+def _starts(terms, positions, docpos):
+    """Posisi awal kemunculan frasa terms pada satu dokumen"""
+    starts = decode_positions(positions[terms[0]][docpos])
+    for offset, term in enumerate(terms[1:], 1):
+        if not starts:
+            break
+        starts = shifted_intersection(starts, decode_positions(positions[term][docpos]), offset)
+    return starts
+
+
+def match_positional(node, index):
+    """Dokumen (posisi, urut naik) yang cocok dengan frasa atau NEAR/k"""
+    operands = node.children if node.op == 'near' else [node]
+    terms = {term for operand in operands for term in _operand_terms(operand)}
+
+    # kandidat: dokumen yang memuat semua term, dari df terkecil
+    candidates = None
+    for term in sorted(terms, key=index.df):
+        plist = index.postings(term)
+        if instrument.ENABLED:
+            instrument.count("boolean.postings_touched", len(plist))
+        candidates = plist if candidates is None else intersect_postings(candidates, plist)
+        if not candidates:
+            return []
+    if not index.has_positions:
+        # indeks tanpa posisi (dict biasa): frasa/NEAR diperlakukan sebagai AND
+        return candidates
+
+    positions = {term: index.term_positions(term) for term in terms}
+    if instrument.ENABLED:
+        instrument.count("boolean.positional_candidates", len(candidates))
+    if node.op == 'phrase':
+        return [d for d in candidates if _starts(node.term, positions, d)]
+
+    a, b = (_operand_terms(child) for child in node.children)
+    return [d for d in candidates
+            if within_distance(_starts(a, positions, d), len(a), _starts(b, positions, d), len(b), node.term)]
+
+
+def _as_bitmap(result, index):
+    return result if isinstance(result, int) else index.bitmap_of(result)
+
+
+def _as_postings(result, index):
+    return index.positions_of(result) if isinstance(result, int) else result
+
+
+def _filter_bitmap(plist, bm, index, keep=True):
+    """Posisi pada plist yang bitnya di bm menyala (keep=False: yang tidak menyala)"""
+    bits = bm.to_bytes(index.n_bytes, 'little')
+    return [x for x in plist if bool(bits[x >> 3] >> (x & 7) & 1) == keep]
+
+
+def _execute(node, index):
+    """Hasil simpul: bitmap (int) untuk simpul padat, selain itu daftar posisi dokumen urut naik"""
+    if node.op == 'term':
+        if instrument.ENABLED:
+            instrument.count("boolean.postings_touched", node.cost)
+        return index.bitmap(node.term) if node.dense else index.postings(node.term)
+    if node.op in ('phrase', 'near'):
+        return match_positional(node, index)
+    if node.op == 'not':
+        return index.all_mask & ~_as_bitmap(_execute(node.children[0], index), index)
+    if node.op == 'or':
+        if node.dense:
+            bm = 0
+            for child in node.children:
+                bm |= _as_bitmap(_execute(child, index), index)
+            return bm
+        return union_postings([_as_postings(_execute(child, index), index) for child in node.children])
+    if node.op == 'and':
+        if node.dense:
+            bm = index.all_mask
+            for child in node.children:
+                bm &= _as_bitmap(_execute(child, index), index)
+                if not bm:
+                    break
+            return bm
+        result = _as_postings(_execute(node.children[0], index), index)
+        for child in node.children[1:]:
+            if not result:
+                break
+            other = _execute(child, index)
+            if isinstance(other, int):
+                result = _filter_bitmap(result, other, index)
+            else:
+                result = intersect_postings(result, other)
+        return result
+    # andnot
+    base = _execute(node.children[0], index)
+    if not base:
+        return base
+    excluded = _execute(node.children[1], index)
+    if isinstance(base, int):
+        return base & ~_as_bitmap(excluded, index)
+    if isinstance(excluded, int):
+        return _filter_bitmap(base, excluded, index, keep=False)
+    return difference_postings(base, excluded)
+
+
+def execute_plan(node, index):
+    """Jalankan rencana query, hasil berupa posisi dokumen urut naik"""
+    return _as_postings(_execute(node, index), index)
+
+
+def plan_query(query, index, analyzer=None):
+    with instrument.timer("boolean.parse"):
+        tokens = tokenize_query(query)
+        if analyzer is not None:
+            tokens = analyzer.analyze_boolean(tokens)
+        ast = drop_empty_terms(build_ast(infix_to_postfix(tokens)))
+    if ast is None:
+        return None
+    with instrument.timer("boolean.plan"):
+        return optimize(ast, index)
+
+
+def explain_query(query, inverted_index, all_docs, analyzer=None):
+    """Tampilkan rencana eksekusi query Boolean beserta perkiraan biayanya"""
+    index = inverted_index if isinstance(inverted_index, BitmapIndex) else BitmapIndex(inverted_index, all_docs)
+    plan = plan_query(query, index, analyzer)
+    if plan is None:
+        return "(query kosong)"
+    return '\n'.join(plan.explain())
+
 
-    postfix = infix_to_postfix(tokens)
-    return eval_postfix(postfix, inverted_index, all_docs)
+def eval_boolean_query(query, inverted_index, all_docs, analyzer=None):
+    # analyzer (QueryAnalyzer): term query dinormalisasi seperti dokumen (stopword & stemming)
+    index = inverted_index if isinstance(inverted_index, BitmapIndex) else BitmapIndex(inverted_index, all_docs)
+    plan = plan_query(query, index, analyzer)
+    if plan is None:
+        return []
+    with instrument.timer("boolean.execute"):
+        positions = execute_plan(plan, index)
+    with instrument.timer("boolean.materialize"):
+        results = [index.doc_ids[i] for i in positions]
+    if instrument.ENABLED:
+        instrument.count("boolean.queries")
+        instrument.count("boolean.documents_matched", len(results))
+    return results
 
 
 if __name__ == "__main__":
@@ -101,10 +680,13 @@ if __name__ == "__main__":
         "vanilla and floral",
         "woody or citrus",
         "citrus not floral",
-        "citrus and ( mint or lemon )"
+        "citrus and ( mint or lemon )",
+        '"white musk"',
+        "vanilla near/3 musk",
     ]
 
+    bitmap_index = BitmapIndex(inverted_index, all_docs)
     for q in queries:
-        res = eval_boolean_query(q, inverted_index, all_docs)
+        res = eval_boolean_query(q, bitmap_index, all_docs)
         print(f"\nQuery: {q}")
         print("Dokumen cocok:", res)
@@ -0,0 +1,488 @@
+
+import os
+import mmap
+import heapq
+import shutil
+import struct
+import tempfile
+from snapshot import resolve_index_path
+
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
+INDEX_PATH = os.path.join(BASE_PATH, "data", "index", "inverted.idx")
+
+# Format file indeks (little-endian):
+#   MAGIC | header (generation, n_docs, n_terms, dict_offset, postings_offset, positions_offset)
+#   tabel dokumen   : [len(doc_id), doc_id, panjang_dokumen] per dokumen
+#   kamus term      : [len(term), term, df, offset_postings, ukuran_postings,
+#                      offset_posisi, ukuran_posisi] per term (urut abjad)
+#   postings        : [delta_docno, tf] per posting
+#   posisi          : [ukuran, delta_posisi x tf] per posting, sejajar dengan postings
+# semua angka dikodekan varint; posisi dipisah supaya VSM tidak ikut membaca posisi
+MAGIC = b"HMNSIDX3"
+HEADER = struct.Struct('<QQQQQQ')
+
+# jumlah entri (posting + posisi) maksimum di memori sebelum SpimiIndexBuilder menumpahkan blok ke disk
+SPIMI_MAX_POSTINGS = 1000000
+
+
+def encode_varint(value, out):
+    """Tambahkan integer non-negatif ke bytearray sebagai varint (7 bit per byte)"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buf, pos):
+    """Baca satu varint dari buf mulai pos, kembalikan (nilai, posisi berikutnya)"""
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_positions(positions):
+    """Posisi token (urut naik) -> bytes berisi selisih antar posisi sebagai varint"""
+    out = bytearray()
+    prev = 0
+    for p in positions:
+        encode_varint(p - prev, out)
+        prev = p
+    return bytes(out)
+
+
+def decode_positions(buf):
+    result = []
+    pos = 0
+    p = 0
+    n = len(buf)
+    while pos < n:
+        delta, pos = decode_varint(buf, pos)
+        p += delta
+        result.append(p)
+    return result
+
+
+def token_positions(tokens):
+    """tokens -> {term: [posisi, ...]}"""
+    positions = {}
+    for i, token in enumerate(tokens):
+        positions.setdefault(token, []).append(i)
+    return positions
+
+
+def iter_processed(processed_dir=PROCESSED_DIR):
+    for fname in sorted(os.listdir(processed_dir)):
+        if fname.endswith('.txt'):
+            with open(os.path.join(processed_dir, fname), 'r', encoding='utf-8') as f:
+                yield fname.replace('.txt', ''), f.read().split()
+
+
+def write_index(docs, index_path=INDEX_PATH):
+    """Tulis indeks terbalik posisional dari iterable (doc_id, tokens) ke satu file biner"""
+    return write_encoded_index(((doc_id, len(tokens), _encode_terms(token_positions(tokens)))
+                                for doc_id, tokens in docs), index_path)
+
+
+def write_encoded_index(docs, index_path=INDEX_PATH, max_postings=None):
+    """Tulis file indeks dari iterable (doc_id, panjang_dokumen, {term: (tf, posisi_terkode)})"""
+    builder = SpimiIndexBuilder(index_path, max_postings)
+    try:
+        for doc_id, length, terms in docs:
+            builder.add_encoded(doc_id, length, terms)
+        return builder.finish()
+    finally:
+        builder.cleanup()
+
+
+def _encode_terms(positions):
+    return {term: (len(plist), encode_positions(plist)) for term, plist in positions.items()}
+
+
+def _encode_postings(plist, out):
+    prev = 0
+    for docno, count, _ in plist:
+        encode_varint(docno - prev, out)
+        encode_varint(count, out)
+        prev = docno
+
+
+def _encode_positions_block(plist, out):
+    for _, _, raw in plist:
+        encode_varint(len(raw), out)
+        out += raw
+
+
+def _encode_run_postings(plist, out):
+    prev = 0
+    for docno, count, raw in plist:
+        encode_varint(docno - prev, out)
+        encode_varint(count, out)
+        encode_varint(len(raw), out)
+        out += raw
+        prev = docno
+
+
+def _iter_run(path):
+    """Baca satu blok SPIMI: yield (term, postings) urut abjad"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        size, pos = decode_varint(data, pos)
+        term = data[pos:pos + size].decode('utf-8')
+        pos += size
+        df, pos = decode_varint(data, pos)
+        docno = 0
+        plist = []
+        for _ in range(df):
+            delta, pos = decode_varint(data, pos)
+            count, pos = decode_varint(data, pos)
+            size, pos = decode_varint(data, pos)
+            docno += delta
+            plist.append((docno, count, data[pos:pos + size]))
+            pos += size
+        yield term, plist
+
+
+class SpimiIndexBuilder:
+    """Pembangun indeks gaya SPIMI: postings di memori dibatasi, blok terurut ditumpahkan ke disk lalu digabung"""
+
+    def __init__(self, index_path=INDEX_PATH, max_postings=None):
+        self.index_path = index_path
+        self.max_postings = max_postings or SPIMI_MAX_POSTINGS
+        self.n_docs = 0
+        self.n_postings = 0
+        self.postings = {}
+        self.runs = []
+        os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+        self.tmp_dir = tempfile.mkdtemp(prefix='spimi-', dir=os.path.dirname(index_path) or '.')
+        self._doc_table = open(os.path.join(self.tmp_dir, 'docs'), 'wb')
+
+    def add_document(self, doc_id, tokens):
+        self.add_positions(doc_id, len(tokens), token_positions(tokens))
+
+    def add_positions(self, doc_id, length, positions):
+        """Tambah satu dokumen dari {term: [posisi, ...]}"""
+        self.add_encoded(doc_id, length, _encode_terms(positions))
+
+    def add_encoded(self, doc_id, length, terms):
+        # posisi disimpan di memori sudah terkode (bytes varint), bukan list int
+        docno = self._add_doc_entry(doc_id, length)
+        for term, (count, raw) in terms.items():
+            self.postings.setdefault(term, []).append((docno, count, raw))
+        self.n_postings += len(terms) + length
+        if self.n_postings >= self.max_postings:
+            self._spill()
+
+    def _add_doc_entry(self, doc_id, length):
+        """Tulis satu baris tabel dokumen; kembalikan docno-nya"""
+        buf = bytearray()
+        raw_id = doc_id.encode('utf-8')
+        encode_varint(len(raw_id), buf)
+        buf += raw_id
+        encode_varint(length, buf)
+        self._doc_table.write(buf)
+        self.n_docs += 1
+        return self.n_docs - 1
+
+    def _spill(self):
+        if not self.postings:
+            return
+        path = os.path.join(self.tmp_dir, f'run{len(self.runs):05d}')
+        with open(path, 'wb') as f:
+            for term in sorted(self.postings):
+                plist = self.postings[term]
+                buf = bytearray()
+                raw_term = term.encode('utf-8')
+                encode_varint(len(raw_term), buf)
+                buf += raw_term
+                encode_varint(len(plist), buf)
+                _encode_run_postings(plist, buf)
+                f.write(buf)
+        self.runs.append(path)
+        self.postings = {}
+        self.n_postings = 0
+
+    def _merged_terms(self):
+        """Gabungkan semua blok (k-way merge); postings term yang sama disambung sesuai urutan blok"""
+        streams = [((term, i, plist) for term, plist in _iter_run(path))
+                   for i, path in enumerate(self.runs)]
+        current, merged = None, []
+        for term, _, plist in heapq.merge(*streams):
+            if term != current:
+                if current is not None:
+                    yield current, merged
+                current, merged = term, []
+            merged.extend(plist)
+        if current is not None:
+            yield current, merged
+
+    def finish(self, terms=None):
+        """Gabungkan blok menjadi satu file indeks; kembalikan (jumlah dokumen, jumlah term)"""
+        # terms: aliran (term, [(docno, tf, posisi_terkode)]) urut abjad yang sudah jadi, mis. hasil
+        # penggabungan dengan indeks lama; dipakai sebagai ganti blok SPIMI
+        if terms is None:
+            self._spill()
+            terms = self._merged_terms()
+        self._doc_table.close()
+        generation = read_generation(self.index_path) + 1
+
+        dict_path = os.path.join(self.tmp_dir, 'dict')
+        postings_path = os.path.join(self.tmp_dir, 'postings')
+        positions_path = os.path.join(self.tmp_dir, 'positions')
+        n_terms = 0
+        offset = 0
+        pos_offset = 0
+        with open(dict_path, 'wb') as fd, open(postings_path, 'wb') as fp, open(positions_path, 'wb') as fpos:
+            for term, plist in terms:
+                buf = bytearray()
+                _encode_postings(plist, buf)
+                fp.write(buf)
+                pos_buf = bytearray()
+                _encode_positions_block(plist, pos_buf)
+                fpos.write(pos_buf)
+                entry = bytearray()
+                raw_term = term.encode('utf-8')
+                encode_varint(len(raw_term), entry)
+                entry += raw_term
+                encode_varint(len(plist), entry)
+                encode_varint(offset, entry)
+                encode_varint(len(buf), entry)
+                encode_varint(pos_offset, entry)
+                encode_varint(len(pos_buf), entry)
+                fd.write(entry)
+                offset += len(buf)
+                pos_offset += len(pos_buf)
+                n_terms += 1
+
+        docs_path = os.path.join(self.tmp_dir, 'docs')
+        dict_offset = len(MAGIC) + HEADER.size + os.path.getsize(docs_path)
+        postings_offset = dict_offset + os.path.getsize(dict_path)
+        positions_offset = postings_offset + offset
+
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as out:
+            out.write(MAGIC)
+            out.write(HEADER.pack(generation, self.n_docs, n_terms, dict_offset, postings_offset,
+                                  positions_offset))
+            for part in (docs_path, dict_path, postings_path, positions_path):
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_path, self.index_path)
+        return self.n_docs, n_terms
+
+    def cleanup(self):
+        if not self._doc_table.closed:
+            self._doc_table.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def read_generation(index_path=INDEX_PATH):
+    """Nomor generasi indeks (naik setiap file indeks ditulis ulang); 0 jika belum ada"""
+    index_path = resolve_index_path(index_path)
+    try:
+        with open(index_path, 'rb') as f:
+            head = f.read(len(MAGIC) + HEADER.size)
+    except FileNotFoundError:
+        return 0
+    if len(head) < len(MAGIC) + HEADER.size or head[:len(MAGIC)] != MAGIC:
+        return 0
+    return HEADER.unpack_from(head, len(MAGIC))[0]
+
+
+def index_version(index_path=INDEX_PATH):
+    """Identitas indeks aktif: (file indeks snapshot CURRENT, generasi)"""
+    # generasi saja tidak cukup: dua build dari snapshot dasar yang sama sama-sama menulis generasi
+    # dasar + 1, padahal isinya berbeda; nama snapshot berganti setiap kali CURRENT ditukar
+    index_path = resolve_index_path(index_path)
+    return os.path.abspath(index_path), read_generation(index_path)
+
+
+def update_index(changed_docs, removed_doc_ids, index_path=INDEX_PATH):
+    """Perbarui file indeks hanya untuk dokumen baru/berubah (doc_id -> tokens) dan yang dihapus"""
+    # indeks lama digabung term per term dengan postings dokumen yang berubah: di memori hanya ada
+    # tabel dokumen, postings dokumen yang berubah, dan postings satu term; posisi disalin apa adanya
+    reader = IndexReader(index_path)
+    try:
+        drop = set(changed_docs) | set(removed_doc_ids)
+        lengths = {doc_id: length for doc_id, length in zip(reader.doc_ids, reader.doc_lengths)
+                   if doc_id not in drop}
+        for doc_id, tokens in changed_docs.items():
+            lengths[doc_id] = len(tokens)
+        # urutan dokumen sama dengan pembangunan penuh (urut nama file)
+        order = sorted(lengths, key=lambda doc_id: doc_id + '.txt')
+        new_docno = {doc_id: docno for docno, doc_id in enumerate(order)}
+        # docno lama -> docno baru (None = dibuang); urutan relatif tetap, postings tetap urut
+        remap = [None if doc_id in drop else new_docno[doc_id] for doc_id in reader.doc_ids]
+
+        fresh = {}
+        for doc_id, tokens in changed_docs.items():
+            docno = new_docno[doc_id]
+            for term, (count, raw) in _encode_terms(token_positions(tokens)).items():
+                fresh.setdefault(term, []).append((docno, count, raw))
+
+        def merged_terms():
+            for term in sorted(set(reader.terms).union(fresh)):
+                plist = [(remap[docno], count, raw) for docno, count, raw in reader.postings_positions(term)
+                         if remap[docno] is not None]
+                if term in fresh:
+                    plist = list(heapq.merge(plist, sorted(fresh[term])))
+                if plist:
+                    yield term, plist
+
+        builder = SpimiIndexBuilder(index_path)
+        try:
+            for doc_id in order:
+                builder._add_doc_entry(doc_id, lengths[doc_id])
+            return builder.finish(merged_terms())
+        finally:
+            builder.cleanup()
+    finally:
+        reader.close()
+
+
+def partition_index(reader, paths, part_of):
+    """Bagi dokumen indeks yang terbuka ke beberapa file indeks (part_of: doc_id -> nomor file);
+    kembalikan jumlah dokumen per file"""
+    # disalin term per term dari reader seperti update_index: tidak perlu teks data/processed
+    # (snapshot hasil ingest katalog tidak punya) dan tidak ada postings yang ditampung di memori
+    owner = [part_of(doc_id) for doc_id in reader.doc_ids]
+    local = []
+    counts = [0] * len(paths)
+    for part in owner:
+        local.append(counts[part])
+        counts[part] += 1
+    terms = sorted(reader.terms)
+
+    def part_terms(part):
+        for term in terms:
+            plist = [(local[docno], count, raw) for docno, count, raw in reader.postings_positions(term)
+                     if owner[docno] == part]
+            if plist:
+                yield term, plist
+
+    for part, path in enumerate(paths):
+        builder = SpimiIndexBuilder(path)
+        try:
+            for docno, doc_id in enumerate(reader.doc_ids):
+                if owner[docno] == part:
+                    builder._add_doc_entry(doc_id, reader.doc_lengths[docno])
+            builder.finish(part_terms(part))
+        finally:
+            builder.cleanup()
+    return counts
+
+
+def build_index_file(processed_dir=PROCESSED_DIR, index_path=INDEX_PATH):
+    """Bangun file indeks dari dokumen hasil preprocessing"""
+    return write_index(iter_processed(processed_dir), index_path)
+
+
+class IndexReader:
+    """Membaca file indeks lewat mmap; postings baru didekode saat term diminta"""
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.path = index_path
+        self._file = open(index_path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{index_path} bukan file indeks yang valid")
+
+        (self.generation, n_docs, n_terms, dict_offset,
+         self._postings_offset, self._positions_offset) = HEADER.unpack_from(self._mm, len(MAGIC))
+        self.version = (os.path.abspath(index_path), self.generation)  # sama dengan index_version()
+
+        buf = self._mm[len(MAGIC) + HEADER.size:self._postings_offset]
+        pos = 0
+        self.doc_ids = []
+        self.doc_lengths = []
+        for _ in range(n_docs):
+            size, pos = decode_varint(buf, pos)
+            self.doc_ids.append(buf[pos:pos + size].decode('utf-8'))
+            pos += size
+            length, pos = decode_varint(buf, pos)
+            self.doc_lengths.append(length)
+
+        # kamus term: term -> (df, offset, ukuran, offset_posisi, ukuran_posisi)
+        self.terms = {}
+        for _ in range(n_terms):
+            size, pos = decode_varint(buf, pos)
+            term = buf[pos:pos + size].decode('utf-8')
+            pos += size
+            df, pos = decode_varint(buf, pos)
+            offset, pos = decode_varint(buf, pos)
+            length, pos = decode_varint(buf, pos)
+            pos_offset, pos = decode_varint(buf, pos)
+            pos_length, pos = decode_varint(buf, pos)
+            self.terms[term] = (df, offset, length, pos_offset, pos_length)
+
+    def __contains__(self, term):
+        return term in self.terms
+
+    def df(self, term):
+        entry = self.terms.get(term)
+        return entry[0] if entry else 0
+
+    def postings(self, term):
+        """Daftar (docno, tf) untuk term, urut docno; [] jika term tidak ada"""
+        entry = self.terms.get(term)
+        if entry is None:
+            return []
+        df, offset, length = entry[:3]
+        start = self._postings_offset + offset
+        buf = self._mm[start:start + length]
+        pos = 0
+        docno = 0
+        result = []
+        for _ in range(df):
+            delta, pos = decode_varint(buf, pos)
+            count, pos = decode_varint(buf, pos)
+            docno += delta
+            result.append((docno, count))
+        return result
+
+    def positions(self, term):
+        """Daftar (docno, posisi_terkode) untuk term; posisi didekode dengan decode_positions"""
+        return [(docno, raw) for docno, _, raw in self.postings_positions(term)]
+
+    def postings_positions(self, term):
+        """Daftar (docno, tf, posisi_terkode) untuk term; [] jika term tidak ada"""
+        entry = self.terms.get(term)
+        if entry is None:
+            return []
+        start = self._positions_offset + entry[3]
+        buf = self._mm[start:start + entry[4]]
+        pos = 0
+        result = []
+        for docno, count in self.postings(term):
+            size, pos = decode_varint(buf, pos)
+            result.append((docno, count, buf[pos:pos + size]))
+            pos += size
+        return result
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+def open_index(index_path=INDEX_PATH, processed_dir=PROCESSED_DIR):
+    """Buka file indeks snapshot aktif (atau index_path); bangun dulu dari data/processed jika belum ada"""
+    # reader memegang mmap file snapshot: tetap konsisten walau snapshot baru dipublikasikan
+    index_path = resolve_index_path(index_path)
+    if not os.path.exists(index_path):
+        build_index_file(processed_dir, index_path)
+    try:
+        return IndexReader(index_path)
+    except ValueError:
+        # format lama/rusak: bangun ulang dari data/processed
+        build_index_file(processed_dir, index_path)
+        return IndexReader(index_path)
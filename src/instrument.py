@@ -0,0 +1,168 @@
+
+import time
+from bisect import bisect_left
+
+
+# Instrumentasi opt-in untuk jalur pencarian. Saat nonaktif, timer() mengembalikan objek
+# kosong yang sama dan count() langsung kembali, jadi biaya di jalur panas praktis nol.
+ENABLED = False
+
+# batas atas bucket histogram latensi (detik), gaya Prometheus
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+METRIC_PREFIX = "hmns"
+
+
+class Histogram:
+    """Histogram latensi dengan bucket tetap (kumulatif saat diekspor)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # slot terakhir = +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Perkiraan kuantil: batas atas bucket tempat kuantil jatuh"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for upper, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return upper
+        return float('inf')
+
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+histograms = {}  # stage -> Histogram
+counters = {}    # nama -> total
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    histograms.clear()
+    counters.clear()
+
+
+def timer(stage):
+    """Context manager pengukur waktu satu tahap, contoh: with timer("vsm.score"): ..."""
+    return _Timer(stage) if ENABLED else _NULL_TIMER
+
+
+def observe(stage, seconds):
+    hist = histograms.get(stage)
+    if hist is None:
+        hist = histograms[stage] = Histogram()
+    hist.observe(seconds)
+
+
+def count(name, n=1):
+    if ENABLED:
+        counters[name] = counters.get(name, 0) + n
+
+
+def snapshot():
+    """Ringkasan metrik dalam bentuk dict (bisa langsung dijadikan JSON)"""
+    stages = {}
+    for stage, hist in sorted(histograms.items()):
+        stages[stage] = {
+            "count": hist.count,
+            "total_ms": hist.sum * 1000,
+            "mean_ms": hist.sum * 1000 / hist.count if hist.count else 0.0,
+            "p50_ms_le": hist.quantile(0.5) * 1000,
+            "p95_ms_le": hist.quantile(0.95) * 1000,
+        }
+    return {"enabled": ENABLED, "stages": stages, "counters": dict(sorted(counters.items()))}
+
+
+def format_table():
+    snap = snapshot()
+    lines = [f"{'Tahap':28s} | {'n':>6} | {'total ms':>10} | {'rata ms':>9} | {'p50 <=':>9} | {'p95 <=':>9}",
+             "-" * 85]
+    for stage, st in snap["stages"].items():
+        lines.append(f"{stage:28s} | {st['count']:6d} | {st['total_ms']:10.3f} | {st['mean_ms']:9.4f} | "
+                     f"{st['p50_ms_le']:9.3f} | {st['p95_ms_le']:9.3f}")
+    if snap["counters"]:
+        lines.append("-" * 85)
+        for name, total in snap["counters"].items():
+            lines.append(f"{name:28s} | {total}")
+    if not snap["stages"] and not snap["counters"]:
+        lines.append("(belum ada metrik tercatat)")
+    return '\n'.join(lines)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def format_prometheus(prefix=METRIC_PREFIX):
+    """Ekspor metrik dalam format teks Prometheus"""
+    lines = [f"# HELP {prefix}_stage_seconds Latensi per tahap pipeline pencarian",
+             f"# TYPE {prefix}_stage_seconds histogram"]
+    for stage, hist in sorted(histograms.items()):
+        label = f'stage="{_label(stage)}"'
+        cumulative = 0
+        for upper, n in zip(hist.buckets, hist.counts):
+            cumulative += n
+            lines.append(f'{prefix}_stage_seconds_bucket{{{label},le="{upper}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_seconds_bucket{{{label},le="+Inf"}} {hist.count}')
+        lines.append(f'{prefix}_stage_seconds_sum{{{label}}} {hist.sum:.9f}')
+        lines.append(f'{prefix}_stage_seconds_count{{{label}}} {hist.count}')
+    lines.append(f"# HELP {prefix}_events_total Penghitung kejadian (postings disentuh, dokumen diskor, ...)")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for name, total in sorted(counters.items()):
+        lines.append(f'{prefix}_events_total{{name="{_label(name)}"}} {total}')
+    return '\n'.join(lines) + '\n'
+
+
+def profile_call(func, *args, sort='cumulative', limit=25, **kwargs):
+    """Jalankan satu pemanggilan di bawah cProfile; kembalikan (hasil, laporan teks)"""
+    import io
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return result, out.getvalue()
@@ -2,24 +2,135 @@
 
 import os
 import re
-from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
-from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
+import sys
+import json
+import hashlib
+import threading
+from itertools import islice
+from collections import OrderedDict
+import instrument
+from index_store import INDEX_PATH, SpimiIndexBuilder, build_index_file, update_index
+from snapshot import SnapshotBuilder, resolve_index_path
 
 # Nanti disesuaiin sendiri path directory nya yaa
 BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 RAW_DIR = os.path.join(BASE_PATH, "data", "raw")
 PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
+STEM_CACHE_PATH = os.path.join(BASE_PATH, "data", "index", "stem_cache.json")
+STEM_CACHE_SIZE = 100000
 
-stemmer = StemmerFactory().create_stemmer()
-stop_factory = StopWordRemoverFactory()
-stopword_list = set(stop_factory.get_stop_words())
+# Objek Sastrawi (stemmer & daftar stopword) mahal dibuat, jadi baru dibuat saat pertama dipakai.
+# preprocess.stemmer / preprocess.stopword_list tetap bisa diakses lewat __getattr__ di bawah.
+_stemmer = None
+_stopword_list = None
+
+def get_stemmer():
+    global _stemmer
+    if _stemmer is None:
+        from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+        _stemmer = StemmerFactory().create_stemmer()
+    return _stemmer
+
+def get_stopwords():
+    global _stopword_list
+    if _stopword_list is None:
+        from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
+        _stopword_list = set(StopWordRemoverFactory().get_stop_words())
+    return _stopword_list
+
+def __getattr__(name):
+    if name == "stemmer":
+        return get_stemmer()
+    if name == "stopword_list":
+        return get_stopwords()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def stem_word(term):
+    return get_stemmer().stem(term)
+
+class StemCache:
+    """Cache LRU term -> bentuk dasar di depan stemmer Sastrawi"""
+
+    def __init__(self, stem_func, maxsize=STEM_CACHE_SIZE):
+        self.stem_func = stem_func
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()  # dipakai bersama thread server saat normalisasi query
+        self.journal = None  # list: catat pasangan baru (worker mengirimnya balik ke proses induk)
+
+    def stem(self, term):
+        data = self._data
+        with self._lock:
+            if term in data:
+                self.hits += 1
+                data.move_to_end(term)
+                return data[term]
+            self.misses += 1
+        result = self.stem_func(term)
+        with self._lock:
+            data[term] = result
+            if len(data) > self.maxsize:
+                data.popitem(last=False)
+            if self.journal is not None:
+                self.journal.append((term, result))
+        return result
+
+    def update(self, pairs):
+        """Tambahkan pasangan (term, bentuk dasar) dari cache lain, mis. hasil worker"""
+        data = self._data
+        with self._lock:
+            for term, result in pairs:
+                data[term] = result
+                data.move_to_end(term)
+            while len(data) > self.maxsize:
+                data.popitem(last=False)
+
+    def take_journal(self):
+        """Pasangan baru sejak pemanggilan sebelumnya"""
+        with self._lock:
+            pairs, self.journal = self.journal, []
+        return pairs
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self._data) > maxsize:
+            self._data.popitem(last=False)
+
+    def items(self):
+        return self._data.items()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data),
+                'maxsize': self.maxsize, 'hit_ratio': self.hits / total if total else 0}
+
+    def load(self, path=STEM_CACHE_PATH):
+        """Muat isi cache dari disk (hasil run sebelumnya) jika ada"""
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for term, stem in json.load(f):
+                    self._data[term] = stem
+            self.resize(self.maxsize)
+
+    def save(self, path=STEM_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self._data.items()), f)
+        os.replace(tmp_path, path)
+
+# dipakai bersama oleh preprocessing dokumen dan normalisasi query
+stem_cache = StemCache(stem_word)
+
+# kata = deretan huruf a-z setelah lower(); karakter lain (spasi, angka, tanda baca) hanya pemisah
+_WORD = re.compile(r'[a-z]+')
 
 def clean_text(text):
     """Menghapus karakter non-huruf dan ubah ke huruf kecil"""
-    text = text.lower()
-    text = re.sub(r'[^a-z\s]', ' ', text)  # hanya huruf dan spasi
-    text = re.sub(r'\s+', ' ', text).strip()  # hilangkan spasi ganda
-    return text
+    # satu scan regex: karakter selain a-z menjadi pemisah, spasi ganda otomatis hilang
+    return ' '.join(_WORD.findall(text.lower()))
 
 def tokenize(text):
     """Memecah teks menjadi token"""
@@ -27,39 +138,306 @@ def tokenize(text):
 
 def remove_stopwords(tokens):
     """Hapus stopword umum Bahasa Indonesia"""
-    return [t for t in tokens if t not in stopword_list and len(t) > 1]
+    stopword_list = get_stopwords()
+    return [t for t in tokens if len(t) > 1 and t not in stopword_list]
 
 def stemming(tokens):
     """Stem setiap token ke bentuk dasar"""
-    return [stemmer.stem(t) for t in tokens]
+    stem = stem_cache.stem
+    return [stem(t) for t in tokens]
 
 def preprocess_text(text):
-    """Pipeline lengkap preprocessing"""
-    text = clean_text(text)
-    tokens = tokenize(text)
-    tokens = remove_stopwords(tokens)
-    tokens = stemming(tokens)
+    """Pipeline lengkap preprocessing (per tahap, dipakai sebagai acuan)"""
+    with instrument.timer("preprocess.clean"):
+        text = clean_text(text)
+    with instrument.timer("preprocess.tokenize"):
+        tokens = tokenize(text)
+    with instrument.timer("preprocess.stopword"):
+        tokens = remove_stopwords(tokens)
+    with instrument.timer("preprocess.stem"):
+        tokens = stemming(tokens)
     return tokens
 
-def process_folder(input_dir=RAW_DIR, output_dir=PROCESSED_DIR):
-    """Proses semua file .txt di data/raw"""
-    os.makedirs(output_dir, exist_ok=True)
+def iter_preprocessed(text):
+    """Tokenizer satu kali scan: yield token yang sudah difilter & di-stem; hasil sama dengan preprocess_text"""
+    # tanpa string bersih dan list antara per tahap; keputusan stopword/stem per kata unik
+    # disimpan dalam dict lokal, jadi kata yang berulang cukup satu lookup ('' = dibuang)
+    stopword_list = get_stopwords()
+    stem = stem_cache.stem
+    terms = {}
+    for word in _WORD.findall(text.lower()):
+        term = terms.get(word)
+        if term is None:
+            term = terms[word] = stem(word) if len(word) > 1 and word not in stopword_list else ''
+        if term:
+            yield term
+
+def preprocess_tokens(text):
+    """preprocess_text versi cepat (iter_preprocessed) untuk indexing"""
+    with instrument.timer("preprocess.tokens"):
+        return list(iter_preprocessed(text))
+
+# ------------------------------
+# Ingestion streaming (memori terbatas)
+# ------------------------------
+CHUNK_SIZE = 1 << 16
+_TRAILING_WORD = re.compile(r'[^a-z][a-z]*$')
+
+def read_text_chunks(path, chunk_size=CHUNK_SIZE):
+    """Baca file teks per potongan, bukan sekaligus dengan f.read()"""
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def iter_tokens(chunks):
+    """Yield token hasil preprocessing dari potongan teks; hasil sama dengan preprocess_text"""
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk.lower()
+        # kata terakhir bisa terpotong di batas chunk, simpan untuk chunk berikutnya
+        m = _TRAILING_WORD.search(text)
+        if m is None:
+            carry = text
+            continue
+        carry = text[m.start() + 1:]
+        yield from iter_preprocessed(text[:m.start() + 1])
+    if carry:
+        yield from iter_preprocessed(carry)
+
+def iter_catalog(source, id_field="id", text_field="text"):
+    """Yield (doc_id, potongan_teks) dari folder .txt, file .jsonl, atau file .csv secara streaming"""
+    if os.path.isdir(source):
+        for fname in sorted(os.listdir(source)):
+            if fname.endswith('.txt'):
+                yield fname.replace('.txt', ''), read_text_chunks(os.path.join(source, fname))
+    elif source.endswith('.jsonl'):
+        with open(source, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    record = json.loads(line)
+                    yield str(record.get(id_field, f"doc{line_no}")), [record.get(text_field) or '']
+    elif source.endswith('.csv'):
+        import csv
+        csv.field_size_limit(2 ** 31 - 1)
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            for row_no, row in enumerate(csv.DictReader(f), 1):
+                yield str(row.get(id_field) or f"doc{row_no}"), [row.get(text_field) or '']
+    else:
+        raise ValueError(f"Sumber tidak dikenali: {source} (gunakan folder, .jsonl, atau .csv)")
+
+def ingest(source, index_path=INDEX_PATH, id_field="id", text_field="text", max_postings=None):
+    """Bangun file indeks langsung dari sumber besar dengan memori terbatas (SPIMI), sebagai snapshot baru"""
+    # teks hasil preprocessing tidak ditulis (processed/ snapshot ini kosong): file indeks adalah satu-satunya
+    # salinan korpus, jadi pembaca folder processed (load_documents, iter_documents, build_inverted_index)
+    # tidak bisa dipakai untuk snapshot katalog; gunakan open_index/IndexReader
+    snapshot = SnapshotBuilder(index_path)
+    try:
+        builder = SpimiIndexBuilder(snapshot.index_path, max_postings)
+        try:
+            for doc_id, chunks in iter_catalog(source, id_field, text_field):
+                positions = {}
+                length = 0
+                for token in iter_tokens(chunks):
+                    positions.setdefault(token, []).append(length)
+                    length += 1
+                builder.add_positions(doc_id, length, positions)
+            result = builder.finish()
+        finally:
+            builder.cleanup()
+        # tanpa manifest: build berikutnya dari data/raw akan memproses ulang semua dokumen
+        save_lexicon(build_lexicon(), lexicon_path_for(snapshot.index_path))
+        published = snapshot.publish()
+        print(f" Snapshot {published.name} aktif: {published.path}")
+    finally:
+        snapshot.discard()
+    return result
+
+def manifest_path_for(index_path):
+    return os.path.join(os.path.dirname(index_path), "manifest.json")
+
+# ------------------------------
+# Leksikon query: bentuk permukaan -> term indeks
+# ------------------------------
+def lexicon_path_for(index_path):
+    return os.path.join(os.path.dirname(index_path), "lexicon.json")
+
+def build_lexicon():
+    """Leksikon dari cache stemming + daftar stopword ('' = token dibuang dari query)"""
+    # dengan --workers > 1 stem baru dari worker sudah digabung ke cache ini oleh preprocess_stream
+    lexicon = dict.fromkeys(get_stopwords(), '')
+    lexicon.update(stem_cache.items())
+    return lexicon
+
+def save_lexicon(lexicon, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(lexicon, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_manifest(path):
+    """Baca manifest {nama_file: {mtime, size, sha1}} dari run sebelumnya"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def scan_changes(input_dir, output_dir, old_manifest, manifest):
+    """Yield (nama_file, teks) untuk file .txt baru/berubah; manifest diisi sambil jalan"""
     for fname in sorted(os.listdir(input_dir)):
         if fname.endswith('.txt'):
             in_path = os.path.join(input_dir, fname)
-            with open(in_path, 'r', encoding='utf-8') as f:
-                raw_text = f.read()
-
-            tokens = preprocess_text(raw_text)
             out_path = os.path.join(output_dir, fname)
-            with open(out_path, 'w', encoding='utf-8') as f:
-                f.write(' '.join(tokens))
+            st = os.stat(in_path)
+            entry = old_manifest.get(fname)
+
+            # mtime & ukuran sama -> tidak perlu dibaca sama sekali
+            if (entry and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size
+                    and os.path.exists(out_path)):
+                manifest[fname] = entry
+                continue
+
+            with open(in_path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha1(data).hexdigest()
+            manifest[fname] = {'mtime': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest}
+            # hanya mtime yang berubah (mis. file di-touch), isi tetap
+            if entry and entry['sha1'] == digest and os.path.exists(out_path):
+                continue
+
+            yield fname, data.decode('utf-8')
+
+def init_worker(stem_cache_path, stem_cache_size):
+    """Inisialisasi worker: buat stemmer sekali per proses dan isi cache stemming dari disk"""
+    get_stemmer()
+    get_stopwords()
+    stem_cache.resize(stem_cache_size)
+    if stem_cache_path:
+        stem_cache.load(stem_cache_path)
+    stem_cache.journal = []
+
+def preprocess_worker(text):
+    """preprocess_tokens di worker, beserta stem baru untuk cache (dan leksikon) proses induk"""
+    tokens = preprocess_tokens(text)
+    return tokens, stem_cache.take_journal()
+
+def preprocess_stream(items, workers=1, stem_cache_path=None):
+    """Yield (nama_file, tokens) sesuai urutan input; paralel dengan process pool jika workers > 1"""
+    if workers <= 1:
+        for fname, text in items:
+            yield fname, preprocess_tokens(text)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # dikirim per batch supaya teks yang menunggu di memori tetap terbatas;
+    # stemmer dibuat oleh init_worker di tiap worker, tidak ikut di-pickle
+    batch_size = workers * 16
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(stem_cache_path, stem_cache.maxsize)) as executor:
+        while True:
+            batch = list(islice(items, batch_size))
+            if not batch:
+                break
+            names = [fname for fname, _ in batch]
+            texts = [text for _, text in batch]
+            chunksize = max(1, len(batch) // (workers * 4))
+            for fname, (tokens, stems) in zip(names, executor.map(preprocess_worker, texts, chunksize=chunksize)):
+                stem_cache.update(stems)
+                yield fname, tokens
+
+def process_folder(input_dir=RAW_DIR, index_path=INDEX_PATH, full=False, workers=1,
+                   stem_cache_path=STEM_CACHE_PATH):
+    """Proses file .txt di data/raw yang baru/berubah ke snapshot indeks baru lalu publikasikan"""
+    # pembaca lain tetap memakai snapshot lama sampai pointer CURRENT ditukar di akhir;
+    # tidak ada file yang ditimpa di tempat (lihat snapshot.py)
+    if stem_cache_path:
+        stem_cache.load(stem_cache_path)
+    active_index = resolve_index_path(index_path)
+    old_manifest = {} if full or not os.path.exists(active_index) else load_manifest(manifest_path_for(active_index))
+    manifest = {}
+    changed = {}
+
+    snapshot = SnapshotBuilder(index_path)
+    try:
+        if old_manifest:
+            snapshot.seed_processed()
+        output_dir = snapshot.processed_dir
+        pending = scan_changes(input_dir, output_dir, old_manifest, manifest)
+        for fname, tokens in preprocess_stream(pending, workers, stem_cache_path):
+            snapshot.write_text(fname, ' '.join(tokens))
+            # token hanya disimpan untuk pembaruan inkremental; build penuh membaca ulang folder processed
+            if old_manifest:
+                changed[fname.replace('.txt', '')] = tokens
 
             print(f" {fname} selesai diproses ({len(tokens)} token)")
 
+        removed = [fname for fname in old_manifest if fname not in manifest]
+        for fname in removed:
+            snapshot.remove_text(fname)
+            print(f" {fname} dihapus dari korpus")
+
+        if not old_manifest:
+            n_docs, n_terms = build_index_file(output_dir, snapshot.index_path)
+            print(f" File indeks ditulis ({n_docs} dokumen, {n_terms} term)")
+        elif changed or removed:
+            removed_ids = [fname.replace('.txt', '') for fname in removed]
+            n_docs, n_terms = update_index(changed, removed_ids, snapshot.index_path)
+            print(f" File indeks diperbarui: {len(changed)} dokumen berubah, {len(removed)} dihapus "
+                  f"({n_docs} dokumen, {n_terms} term)")
+        else:
+            print(" Tidak ada dokumen yang berubah, indeks tetap dipakai.")
+        save_manifest(manifest, manifest_path_for(snapshot.index_path))
+        save_lexicon(build_lexicon(), lexicon_path_for(snapshot.index_path))
+        if changed or removed or not old_manifest:
+            published = snapshot.publish()
+            print(f" Snapshot {published.name} aktif: {published.path}")
+    finally:
+        snapshot.discard()
+
+    if stem_cache_path:
+        stem_cache.save(stem_cache_path)
+    if workers <= 1:
+        st = stem_cache.stats()
+        print(f" Cache stemming: {st['hits']} hit, {st['misses']} miss "
+              f"(hit ratio {st['hit_ratio']:.2%}, {st['size']} entri)")
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Preprocessing korpus parfum")
+    parser.add_argument("--full", action="store_true", help="proses ulang semua dokumen")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="jumlah proses paralel untuk preprocessing (0 = semua core)")
+    parser.add_argument("--stem-cache-size", type=int, default=STEM_CACHE_SIZE,
+                        help="jumlah maksimum entri cache stemming (LRU)")
+    parser.add_argument("--catalog", help="bangun indeks langsung dari katalog besar (.jsonl/.csv/folder)")
+    parser.add_argument("--id-field", default="id", help="kolom id dokumen pada katalog")
+    parser.add_argument("--text-field", default="text", help="kolom teks deskripsi pada katalog")
+    args = parser.parse_args()
+
+    if args.catalog:
+        stem_cache.resize(args.stem_cache_size)
+        print(f"Ingestion katalog: {args.catalog}")
+        n_docs, n_terms = ingest(args.catalog, INDEX_PATH, args.id_field, args.text_field)
+        print(f"Indeks katalog selesai ({n_docs} dokumen, {n_terms} term)")
+        sys.exit(0)
+
     print("Mulai preprocessing korpus parfum ...")
     print(f"Input  : {RAW_DIR}")
-    print(f"Output : {PROCESSED_DIR}")
-    process_folder()
+    print(f"Output : snapshot baru di {os.path.dirname(INDEX_PATH)}/snapshots")
+    stem_cache.resize(args.stem_cache_size)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    process_folder(full=args.full, workers=workers)
     print("Semua dokumen selesai diproses!")
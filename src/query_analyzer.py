@@ -0,0 +1,117 @@
+
+import os
+import json
+from index_store import INDEX_PATH
+from snapshot import resolve_index_path
+from preprocess import clean_text, get_stopwords, stem_cache, lexicon_path_for
+from boolean_ir import near_distance
+from term_dict import WILDCARD, is_pattern
+
+BOOLEAN_SYNTAX = ('and', 'or', 'not', '(', ')')
+EMPTY_TERM = ''  # operand yang hilang setelah normalisasi (stopword), dibuang oleh planner Boolean
+
+
+def load_lexicon(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class QueryAnalyzer:
+    """Normalisasi query dengan pipeline yang sama seperti dokumen (clean, stopword, stem)"""
+
+    def __init__(self, lexicon=None, index_path=INDEX_PATH):
+        # leksikon dibangun saat indexing: satu lookup dict per token, tanpa memanggil stemmer
+        self.lexicon = load_lexicon(lexicon_path_for(resolve_index_path(index_path))) if lexicon is None else lexicon
+        self.use_pipeline = True
+        self.hits = 0
+        self.misses = 0
+
+    def term(self, token):
+        """Token yang sudah dibersihkan -> term indeks, '' jika dibuang (stopword/terlalu pendek)"""
+        term = self.lexicon.get(token)
+        if term is not None:
+            self.hits += 1
+            return term
+        self.misses += 1
+        if len(token) <= 1:
+            return ''
+        if self.use_pipeline:
+            try:
+                if token in get_stopwords():
+                    return ''
+                return stem_cache.stem(token)
+            except ImportError:
+                # Sastrawi tidak terpasang: token dipakai apa adanya
+                self.use_pipeline = False
+        return token
+
+    def pattern(self, token):
+        """'Sandal*' -> 'sandal*', 'vanila~2' -> 'vanila~2' (tidak di-stem); None jika bukan tepat satu kata"""
+        if token.endswith(WILDCARD):
+            body, suffix = token.rstrip(WILDCARD), WILDCARD
+        else:
+            body, tilde, edits = token.rpartition('~')
+            suffix = tilde + edits
+        words = clean_text(body).split()
+        return words[0] + suffix if len(words) == 1 else None
+
+    def analyze(self, query):
+        """Query bebas (VSM) -> daftar term; wildcard/fuzzy dipertahankan untuk diperluas oleh engine"""
+        term = self.term
+        if WILDCARD not in query and '~' not in query:
+            return [t for t in map(term, clean_text(query).split()) if t]
+        terms = []
+        for token in query.split():
+            pattern = self.pattern(token) if is_pattern(token) else None
+            if pattern is not None:
+                terms.append(pattern)
+            else:
+                terms.extend(t for t in map(term, clean_text(token).split()) if t)
+        return terms
+
+    def analyze_text(self, query):
+        return ' '.join(self.analyze(query))
+
+    def analyze_boolean(self, tokens):
+        """Token query Boolean -> token ter-normalisasi; operator, NEAR/k dan kurung dipertahankan"""
+        out = []
+        for token in tokens:
+            low = token.lower()
+            if low in BOOLEAN_SYNTAX or near_distance(low) is not None:
+                out.append(low)
+                continue
+            terms = self.analyze(token)
+            if not terms:
+                out.append(EMPTY_TERM)
+            elif len(terms) == 1:
+                out.append(terms[0])
+            else:
+                # frasa '"white musk"' atau token yang pecah jadi beberapa kata (mis. eau-de-parfum):
+                # dicocokkan sebagai frasa, posisinya sama dengan dokumen karena stopword juga dibuang di sana
+                out.append('"' + ' '.join(terms) + '"')
+        return out
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'lexicon': len(self.lexicon),
+                'hit_ratio': self.hits / total if total else 0}
+
+
+_analyzers = {}
+
+def get_analyzer(index_path=INDEX_PATH):
+    """QueryAnalyzer bersama per proses; leksikon dimuat ulang jika snapshot atau file leksikon berubah"""
+    path = lexicon_path_for(resolve_index_path(index_path))
+    try:
+        version = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        version = (path, None)
+    key = os.path.abspath(index_path)
+    cached = _analyzers.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, QueryAnalyzer(index_path=index_path))
+        _analyzers[key] = cached
+    return cached[1]
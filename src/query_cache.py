@@ -0,0 +1,92 @@
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_TTL = 600  # detik
+
+
+def estimate_size(value):
+    """Perkiraan ukuran memori (byte) hasil query: list/tuple berisi string dan angka"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class QueryCache:
+    """Cache hasil query: LRU + TTL, dibatasi total ukuran dalam byte"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_used = 0
+        self._data = OrderedDict()  # key -> (waktu_simpan, ukuran, nilai)
+        self._lock = threading.Lock()  # server menjalankan query di beberapa thread sekaligus
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, size, value = entry
+        if self.ttl is not None and self.clock() - stored_at > self.ttl:
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        size = estimate_size(key) + estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._put(key, value, size)
+
+    def _put(self, key, value, size):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (self.clock(), size, value)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self.bytes_used -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes_used = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._data), 'bytes': self.bytes_used, 'max_bytes': self.max_bytes,
+                'hit_ratio': self.hits / total if total else 0}
+
+
+def normalize_vsm_query(query):
+    # VSM memperlakukan query sebagai bag-of-words: urutan kata tidak berpengaruh
+    return ' '.join(sorted(query.lower().split()))
+
+
+def normalize_boolean_query(tokens):
+    return ' '.join(t.lower() for t in tokens)
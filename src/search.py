@@ -1,16 +1,78 @@
 
 
+import time
+STARTUP_BEGIN = time.perf_counter()
+
 import os
 import sys
-from preprocess import process_folder
-from boolean_ir import build_inverted_index, eval_boolean_query
-from vsm_ir import load_documents, build_vocabulary, rank_documents
-from evaluation import evaluate_system
-from analyze_results import evaluate as eval_query_case   # ← tambahan dari analyze_results.py
+import importlib
+import instrument
+from query_cache import QueryCache, normalize_boolean_query, normalize_vsm_query
+# modul lain (preprocess/Sastrawi, boolean_ir, vsm_ir, evaluasi) diimpor di menu yang membutuhkannya
 
 BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 RAW_DIR = os.path.join(BASE_PATH, "data", "raw")
 PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
+INDEX_PATH = os.path.join(BASE_PATH, "data", "index", "inverted.idx")
+
+# cache hasil query dipakai bersama mode Boolean & VSM; kunci memuat generasi indeks
+# sehingga hasil lama otomatis tidak terpakai setelah preprocessing membangun ulang indeks
+query_cache = QueryCache()
+
+def cached_query(key, compute):
+    with instrument.timer("cache.lookup"):
+        result = query_cache.get(key)
+    if result is None:
+        result = compute()
+        query_cache.put(key, result)
+    return result
+
+def print_cache_stats():
+    st = query_cache.stats()
+    print(f"Cache query: {st['hits']} hit, {st['misses']} miss (hit ratio {st['hit_ratio']:.2%}), "
+          f"{st['entries']} entri, {st['bytes'] / 1024:.1f} KB dari {st['max_bytes'] / 1024:.0f} KB")
+
+def print_corrections(corrections):
+    """Tampilkan term query yang dikoreksi otomatis (salah ketik) oleh VSM"""
+    for term, matches in corrections.items():
+        print(f"Term '{term}' tidak ada di indeks, dicari sebagai: {', '.join(matches)}")
+
+# -------------------------------------------------
+# Instrumentasi (opt-in: --instrument atau perintah 'metrics on')
+# -------------------------------------------------
+METRICS_HELP = ("Perintah metrik: 'metrics' (tabel), 'metrics prom' (teks Prometheus), "
+                "'metrics on/off/reset', 'profile <query>' (cProfile satu query)")
+
+def print_metrics(fmt="table"):
+    if not instrument.ENABLED:
+        print("Instrumentasi nonaktif; jalankan dengan --instrument atau ketik 'metrics on'.")
+    print(instrument.format_prometheus() if fmt == "prom" else instrument.format_table())
+
+def handle_metrics_command(query, run_query):
+    """Tangani perintah metrics/profile di prompt pencarian; True jika query adalah perintah"""
+    if query.startswith("profile "):
+        results, report = instrument.profile_call(run_query, query[len("profile "):])
+        print(report)
+        print(f"({len(results)} hasil, tanpa cache)")
+        return True
+    parts = query.split()
+    if not parts or parts[0] != "metrics":
+        return False
+    action = parts[1] if len(parts) > 1 else "table"
+    if action == "on":
+        instrument.enable()
+        print("Instrumentasi aktif.")
+    elif action == "off":
+        instrument.disable()
+        print("Instrumentasi nonaktif.")
+    elif action == "reset":
+        instrument.reset()
+        print("Metrik dikosongkan.")
+    elif action in ("table", "prom"):
+        print_metrics(action)
+    else:
+        print(METRICS_HELP)
+    return True
 
 # -------------------------------------------------
 # Helper: cek folder data
@@ -35,9 +97,10 @@ def main_menu():
         print("3. Pencarian Vector Space Model (TF-IDF)")
         print("4. Evaluasi Sistem (Precision, Recall, F1)")
         print("5. Analisis Hasil Evaluasi (Analyze Results)")
+        print("6. Metrik Instrumentasi")
         print("0. Keluar")
 
-        choice = input("\nPilih menu [0-5]: ").strip()
+        choice = input("\nPilih menu [0-6]: ").strip()
 
         if choice == "1":
             run_preprocessing()
@@ -49,6 +112,8 @@ def main_menu():
             run_evaluation()
         elif choice == "5":
             run_analyze_results()
+        elif choice == "6":
+            run_metrics()
         elif choice == "0":
             print("Keluar dari program.")
             break
@@ -59,24 +124,56 @@ def main_menu():
 # 1️⃣ Preprocessing
 # -------------------------------------------------
 def run_preprocessing():
+    from preprocess import process_folder
+
     print("\nMenjalankan Preprocessing...")
     check_data()
-    process_folder(RAW_DIR, PROCESSED_DIR)
-    print("Preprocessing selesai. File tersimpan di data/processed/")
+    process_folder(RAW_DIR, INDEX_PATH)
+    print("Preprocessing selesai. Indeks baru aktif; mode pencarian yang sedang berjalan tetap memakai snapshot lama.")
 
 # -------------------------------------------------
 # 2️⃣ Boolean Retrieval
 # -------------------------------------------------
 def run_boolean_search():
+    from boolean_ir import load_inverted_index, eval_boolean_query, explain_query, tokenize_query, BitmapIndex
+    from query_analyzer import get_analyzer
+    from index_store import index_version
+
     print("\nMODE: BOOLEAN RETRIEVAL")
-    inverted_index, all_docs = build_inverted_index(PROCESSED_DIR)
+    inverted_index, all_docs = load_inverted_index(INDEX_PATH, PROCESSED_DIR)
+    bitmap_index = BitmapIndex(inverted_index, all_docs)
+    analyzer = get_analyzer(INDEX_PATH)
     print(f"Inverted Index terbentuk ({len(all_docs)} dokumen)")
 
     while True:
-        query = input("\nMasukkan query (gunakan AND/OR/NOT, ketik 'exit' untuk kembali): ").lower()
+        query = input("\nMasukkan query (gunakan AND/OR/NOT, \"frasa\" dan NEAR/k, awali 'explain' untuk melihat rencana, "
+                      "'stats' untuk statistik cache, 'metrics'/'profile <query>' untuk instrumentasi, "
+                      "ketik 'exit' untuk kembali): ").lower()
         if query == "exit":
             break
-        results = eval_boolean_query(query, inverted_index, all_docs)
+        if query == "stats":
+            print_cache_stats()
+            continue
+        # snapshot baru dari preprocessing di proses lain: muat ulang sebelum query berikutnya
+        if index_version(INDEX_PATH) != inverted_index.version:
+            inverted_index, all_docs = load_inverted_index(INDEX_PATH, PROCESSED_DIR)
+            bitmap_index = BitmapIndex(inverted_index, all_docs)
+            analyzer = get_analyzer(INDEX_PATH)
+            print(f"Indeks baru dimuat ({len(all_docs)} dokumen)")
+        try:
+            # 'profile <query>' menjalankan query juga: query rusak ditangani sama seperti query biasa
+            if handle_metrics_command(query, lambda q: eval_boolean_query(q, bitmap_index, all_docs, analyzer)):
+                continue
+            if query.startswith("explain "):
+                query = query[len("explain "):]
+                print("Rencana query:")
+                print(explain_query(query, bitmap_index, all_docs, analyzer))
+            key = ("boolean", inverted_index.version,
+                   normalize_boolean_query(analyzer.analyze_boolean(tokenize_query(query))))
+            results = cached_query(key, lambda: eval_boolean_query(query, bitmap_index, all_docs, analyzer))
+        except ValueError as e:
+            print(f"Query tidak valid: {e}")
+            continue
         if results:
             print(f"Dokumen cocok: {results}")
         else:
@@ -85,20 +182,46 @@ def run_boolean_search():
 # -------------------------------------------------
 # 3️⃣ Vector Space Model (TF-IDF)
 # -------------------------------------------------
+SCORE_LABELS = {"tfidf": "Cosine Similarity", "logtf": "Cosine Similarity (log-tf)",
+                "bm25": "BM25", "bm25+": "BM25+"}
+
 def run_vsm_search():
+    from vsm_ir import get_engine, WEIGHTINGS, DEFAULT_WEIGHTING
+
     print("\nMODE: VECTOR SPACE MODEL (TF-IDF)")
-    docs = load_documents(PROCESSED_DIR)
-    vocab, df = build_vocabulary(docs)
-    print(f" {len(docs)} dokumen dimuat, {len(vocab)} kosakata unik.")
+    weighting = DEFAULT_WEIGHTING
+    index = get_engine(weighting, INDEX_PATH, PROCESSED_DIR)
+    print(f" {index.N} dokumen dimuat, {len(index.vocab)} kosakata unik.")
+    print(f" Model ranking: {weighting} (ganti dengan 'mode <{'/'.join(WEIGHTINGS)}>')")
 
     while True:
-        query = input("\nMasukkan query pencarian (ketik 'exit' untuk kembali): ").lower()
+        query = input("\nMasukkan query pencarian ('mode <model>' untuk ganti model, 'stats' untuk statistik cache, "
+                      "'metrics'/'profile <query>' untuk instrumentasi, ketik 'exit' untuk kembali): ").lower()
         if query == "exit":
             break
+        if query == "stats":
+            print_cache_stats()
+            continue
+        # hanya 'mode' atau 'mode <model>': query biasa seperti 'modern woody' tetap dicari
+        if query == "mode" or query.startswith("mode "):
+            name = query[len("mode"):].strip()
+            if name not in WEIGHTINGS:
+                print(f"Model tidak dikenal. Pilihan: {', '.join(WEIGHTINGS)}")
+                continue
+            weighting = name
+            index = get_engine(weighting, INDEX_PATH, PROCESSED_DIR)
+            print(f"Model ranking sekarang: {weighting}")
+            continue
+        # get_engine memuat ulang hanya jika snapshot aktif berganti
+        index = get_engine(weighting, INDEX_PATH, PROCESSED_DIR)
+        if handle_metrics_command(query, lambda q: index.search(q, k=5)):
+            continue
 
-        results = rank_documents(query, docs, vocab, df)
-        print("\nHasil Ranking (Cosine Similarity):")
-        for doc, score in results[:5]:
+        key = ("vsm", weighting, index.version, normalize_vsm_query(index.analyzer.analyze_text(query)), 5)
+        results = cached_query(key, lambda: index.search(query, k=5))
+        print_corrections(index.corrections(query))
+        print(f"\nHasil Ranking ({SCORE_LABELS.get(weighting, weighting)}):")
+        for doc, score in results:
             if score > 0:
                 print(f"{doc:10s} → skor: {score:.4f}")
         print("-" * 40)
@@ -107,11 +230,14 @@ def run_vsm_search():
 # 4️⃣ Evaluasi Sistem (Manual)
 # -------------------------------------------------
 def run_evaluation():
+    from evaluation import evaluate_system
+    from vsm_ir import get_engine
+
     print("\nMODE: EVALUASI SISTEM (Manual Input)")
     query = input("Masukkan query evaluasi: ").lower()
     relevan = input("Masukkan dokumen relevan (pisahkan dengan koma, contoh: doc6,doc1): ").split(",")
     relevan = [r.strip() for r in relevan if r.strip() != ""]
-    evaluate_system(query, relevan)
+    evaluate_system(query, relevan, get_engine(index_path=INDEX_PATH, processed_dir=PROCESSED_DIR))
     print("\nEvaluasi selesai.")
 
 # -------------------------------------------------
@@ -123,23 +249,15 @@ def run_analyze_results():
 
     import analyze_results as ar
 
-    docs = ar.load_documents()
-    vocab, df = ar.build_vocabulary(docs)
+    index = ar.get_engine(index_path=INDEX_PATH, processed_dir=PROCESSED_DIR)
 
-    test_cases = [
-        ("vanilla floral aroma", ["doc6", "doc1"]),
-        ("woody amber warm", ["doc1", "doc3", "doc5"]),
-        ("fresh citrus mint", ["doc3", "doc8"]),
-        ("musk jasmine floral", ["doc2", "doc6", "doc7"]),
-        ("lavender sandalwood calm", ["doc9"])
-    ]
+    test_cases = ar.load_test_cases()
 
     print(f"{'Query':35s} | {'Precision':>10} | {'Recall':>10} | {'F1-score':>10}")
     print("-" * 75)
 
     total_p, total_r, total_f = 0, 0, 0
-    for query, rel in test_cases:
-        p, r, f = eval_query_case(query, rel, docs, vocab, df)
+    for (query, rel), (p, r, f) in zip(test_cases, ar.evaluate_all(test_cases, index)):
         total_p += p
         total_r += r
         total_f += f
@@ -149,8 +267,101 @@ def run_analyze_results():
     print("-" * 75)
     print(f"{'Rata-rata':35s} | {total_p/n:10.2f} | {total_r/n:10.2f} | {total_f/n:10.2f}")
 
+    print("\nPerbandingan Model Ranking (kualitas & latensi)")
+    print("-" * 96)
+    ar.print_weighting_comparison(
+        ar.compare_weightings(test_cases, index_path=INDEX_PATH, processed_dir=PROCESSED_DIR))
+
+    print("\nMetrik Ranking (evaluasi batch)")
+    ar.print_batch_summary(ar.run_batch(ar.load_judgments(), k=5, index=index))
+
+# -------------------------------------------------
+# 6️⃣ Metrik Instrumentasi
+# -------------------------------------------------
+def run_metrics():
+    print("\nMODE: METRIK INSTRUMENTASI")
+    print(METRICS_HELP)
+    while True:
+        command = input("\nPerintah metrik (ketik 'exit' untuk kembali): ").strip().lower()
+        if command == "exit":
+            break
+        if not command.startswith("metrics"):
+            command = f"metrics {command}".strip()
+        handle_metrics_command(command, None)
+
+# -------------------------------------------------
+# Profil waktu startup
+# -------------------------------------------------
+def profile_startup(startup_ms):
+    """Ukur waktu impor & inisialisasi tiap komponen (jalankan di proses baru)"""
+    rows = []
+
+    def measure(name, func):
+        start = time.perf_counter()
+        try:
+            func()
+            status = ""
+        except Exception as e:  # komponen opsional boleh gagal, tetap dilaporkan
+            status = f"  ({type(e).__name__}: {e})"
+        rows.append((name, (time.perf_counter() - start) * 1000, status))
+
+    for module in ("query_cache", "index_store", "boolean_ir", "vsm_ir",
+                   "batch_eval", "analyze_results", "evaluation", "preprocess"):
+        measure(f"import {module}", lambda m=module: importlib.import_module(m))
+
+    def load_boolean():
+        import boolean_ir
+        inverted_index, all_docs = boolean_ir.load_inverted_index(INDEX_PATH, PROCESSED_DIR)
+        boolean_ir.BitmapIndex(inverted_index, all_docs)
+
+    def load_vsm():
+        import vsm_ir
+        vsm_ir.TfidfIndex.from_index_file(INDEX_PATH, PROCESSED_DIR)
+
+    measure("init stemmer Sastrawi", lambda: importlib.import_module("preprocess").get_stemmer())
+    measure("init stopword Sastrawi", lambda: importlib.import_module("preprocess").get_stopwords())
+    measure("muat indeks Boolean", load_boolean)
+    measure("muat indeks VSM", load_vsm)
+    measure("import numpy+scipy (mode matriks)",
+            lambda: importlib.import_module("vsm_ir")._load_matrix_backend())
+
+    print(f"{'Komponen':40s} | {'Waktu (ms)':>10}")
+    print("-" * 55)
+    for name, ms, status in rows:
+        print(f"{name:40s} | {ms:10.2f}{status}")
+    print("-" * 55)
+    print(f"Waktu sampai prompt menu pertama: {startup_ms:.2f} ms (tanpa interpreter)")
+
 # -------------------------------------------------
 # Jalankan Program
 # -------------------------------------------------
+MODES = {
+    "1": run_preprocessing,
+    "2": run_boolean_search,
+    "3": run_vsm_search,
+    "4": run_evaluation,
+    "5": run_analyze_results,
+    "6": run_metrics,
+}
+
+USAGE = "Penggunaan: python src/search.py [1-6] [--profile-startup] [--instrument]"
+
 if __name__ == "__main__":
-    main_menu()
+    # argumen dibaca manual: argparse sendiri menambah puluhan ms ke waktu startup
+    args = sys.argv[1:]
+    startup_ms = (time.perf_counter() - STARTUP_BEGIN) * 1000
+    if "--instrument" in args:
+        instrument.enable()
+        args.remove("--instrument")
+
+    if "-h" in args or "--help" in args:
+        print(USAGE)
+    elif "--profile-startup" in args:
+        profile_startup(startup_ms)
+    elif args and args[0] in MODES:
+        MODES[args[0]]()
+    elif args:
+        print(USAGE)
+        sys.exit(2)
+    else:
+        main_menu()
@@ -0,0 +1,330 @@
+
+import os
+import json
+import time
+import asyncio
+import threading
+import argparse
+from urllib.parse import urlsplit, parse_qs
+
+from boolean_ir import load_inverted_index, eval_boolean_query, tokenize_query, BitmapIndex
+from vsm_ir import TfidfIndex
+from analyze_results import precision_recall_f1, evaluate_all
+from batch_eval import load_test_cases
+from query_cache import QueryCache, normalize_boolean_query, normalize_vsm_query
+from query_analyzer import QueryAnalyzer
+from index_store import index_version
+from snapshot import resolve_index_path
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
+INDEX_PATH = os.path.join(BASE_PATH, "data", "index", "inverted.idx")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 1024 * 1024
+RELOAD_INTERVAL = 2.0  # detik antar pengecekan snapshot indeks baru
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class IndexState:
+    """Indeks Boolean & VSM dari satu snapshot; tidak diubah setelah dibuat"""
+
+    def __init__(self, index_path, processed_dir):
+        # pointer CURRENT dibaca sekali: Boolean, VSM, dan leksikon pasti dari snapshot yang sama
+        self.index_path = resolve_index_path(index_path)
+        inverted_index, all_docs = load_inverted_index(self.index_path, processed_dir)
+        self.inverted_index = inverted_index
+        self.all_docs = all_docs
+        self.bitmap_index = BitmapIndex(inverted_index, all_docs)
+        self.analyzer = QueryAnalyzer(index_path=self.index_path)
+        self.tfidf = TfidfIndex.from_index_file(self.index_path, processed_dir)
+        self.tfidf.analyzer = self.analyzer
+        self.generation = inverted_index.generation
+        self.version = inverted_index.version  # identitas snapshot: kunci cache & deteksi indeks baru
+
+
+class SearchService:
+    """Indeks Boolean & VSM yang dimuat sekali dan dipakai untuk semua request"""
+
+    def __init__(self, index_path=INDEX_PATH, processed_dir=PROCESSED_DIR):
+        self.index_path = index_path
+        self.processed_dir = processed_dir
+        self.cache = QueryCache()
+        self._reload_lock = threading.Lock()  # /reload dan watcher tidak memuat indeks bersamaan
+        self.reload()
+
+    def reload(self):
+        # state baru dibangun lengkap dulu, lalu ditukar dengan satu assignment; request yang sedang
+        # berjalan tetap memakai state lama yang dipegangnya sampai selesai
+        with self._reload_lock:
+            state = self.state = IndexState(self.index_path, self.processed_dir)
+        return {"generation": state.generation, "documents": len(state.all_docs)}
+
+    def needs_reload(self):
+        # dibandingkan dengan snapshot, bukan generasi: dua build dari dasar yang sama bisa bergenerasi sama
+        return index_version(self.index_path) != self.state.version
+
+    # atribut lama tetap tersedia, selalu dari state yang aktif
+    @property
+    def all_docs(self):
+        return self.state.all_docs
+
+    @property
+    def generation(self):
+        return self.state.generation
+
+    @property
+    def tfidf(self):
+        return self.state.tfidf
+
+    def _cached(self, key, compute):
+        result = self.cache.get(key)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result)
+        return result
+
+    def boolean(self, query):
+        state = self.state
+        key = ("boolean", state.version,
+               normalize_boolean_query(state.analyzer.analyze_boolean(tokenize_query(query))))
+        results = self._cached(key, lambda: eval_boolean_query(query, state.bitmap_index, state.all_docs,
+                                                               state.analyzer))
+        return {"query": query, "results": results}
+
+    def vsm(self, query, k=5):
+        state = self.state
+        key = ("vsm", state.version, normalize_vsm_query(state.analyzer.analyze_text(query)), k)
+        results = self._cached(key, lambda: state.tfidf.search(query, k=k))
+        return {"query": query, "corrections": state.tfidf.corrections(query),
+                "results": [{"doc": doc, "score": score} for doc, score in results]}
+
+    def evaluate(self, query=None, relevant=None, test_cases=None):
+        tfidf = self.state.tfidf
+        if query is not None:
+            ranked = tfidf.search(query)
+            p, r, f = precision_recall_f1(ranked, relevant or [])
+            retrieved = [doc for doc, score in ranked if score > 0]
+            return {"query": query, "relevant": relevant or [], "retrieved": retrieved,
+                    "precision": p, "recall": r, "f1": f}
+
+        cases = [(q, rel) for q, rel in (test_cases or load_test_cases())]
+        rows = []
+        for (q, rel), (p, r, f) in zip(cases, evaluate_all(cases, tfidf)):
+            rows.append({"query": q, "relevant": rel, "precision": p, "recall": r, "f1": f})
+        return {"results": rows}
+
+    def stats(self):
+        state = self.state
+        return {"generation": state.generation, "documents": len(state.all_docs),
+                "cache": self.cache.stats()}
+
+
+def _param(params, name, default=None):
+    value = params.get(name, default)
+    if isinstance(value, list):
+        value = value[0] if value else default
+    return value
+
+
+def _text_param(params, name, required=True):
+    """Parameter teks (query string atau JSON); bukan teks -> 400, bukan error 500 di handler"""
+    value = _param(params, name)
+    if value is None or value == "":
+        if required:
+            raise HttpError(400, f"parameter '{name}' wajib diisi")
+        return None
+    if not isinstance(value, str):
+        raise HttpError(400, f"parameter '{name}' harus berupa teks")
+    return value
+
+
+def _list_param(params, name):
+    """Daftar teks: 'a,b' atau ?name=a&name=b (GET), string atau list string (JSON)"""
+    value = params.get(name)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise HttpError(400, f"parameter '{name}' harus berupa teks dipisah koma atau list teks")
+    return [r.strip() for v in value for r in v.split(",") if r.strip()]
+
+
+class SearchServer:
+    """Server HTTP/JSON berbasis asyncio (stdlib saja) di atas SearchService"""
+
+    def __init__(self, service, reload_interval=RELOAD_INTERVAL):
+        self.service = service
+        self.reload_interval = reload_interval
+        self.routes = {
+            "/health": self.handle_health,
+            "/stats": self.handle_stats,
+            "/boolean": self.handle_boolean,
+            "/vsm": self.handle_vsm,
+            "/evaluate": self.handle_evaluate,
+            "/reload": self.handle_reload,
+        }
+        # pekerjaan CPU (query & evaluasi) dijalankan di thread pool, bukan di event loop,
+        # supaya satu request berat (atau memuat ulang indeks) tidak menahan request lain dan koneksi baru
+        self.blocking = {self.handle_boolean, self.handle_vsm, self.handle_evaluate, self.handle_reload}
+
+    def handle_health(self, method, params):
+        return {"status": "ok"}
+
+    def handle_stats(self, method, params):
+        return self.service.stats()
+
+    def handle_boolean(self, method, params):
+        query = _text_param(params, "q")
+        try:
+            return self.service.boolean(query.lower())
+        except ValueError as e:  # query Boolean rusak, mis. 'and vanilla'
+            raise HttpError(400, f"query Boolean tidak valid: {e}")
+
+    def handle_vsm(self, method, params):
+        query = _text_param(params, "q")
+        try:
+            k = int(_param(params, "k", 5))
+        except (TypeError, ValueError):
+            raise HttpError(400, "parameter 'k' harus bilangan bulat")
+        return self.service.vsm(query.lower(), k)
+
+    def handle_evaluate(self, method, params):
+        query = _text_param(params, "q", required=False) or _text_param(params, "query", required=False)
+        relevant = _list_param(params, "relevant")
+        if query is not None:
+            return self.service.evaluate(query=query.lower(), relevant=relevant)
+        return self.service.evaluate(test_cases=params.get("test_cases"))
+
+    def handle_reload(self, method, params):
+        if method != "POST":
+            raise HttpError(405, "gunakan POST untuk /reload")
+        return self.service.reload()
+
+    def route(self, method, target, body):
+        """Request -> (handler, params)"""
+        url = urlsplit(target)
+        handler = self.routes.get(url.path)
+        if handler is None:
+            raise HttpError(404, f"endpoint {url.path} tidak dikenal")
+        if method not in ("GET", "POST"):
+            raise HttpError(405, f"method {method} tidak didukung")
+
+        params = parse_qs(url.query)
+        if body:
+            try:
+                payload = json.loads(body.decode('utf-8'))
+            except (UnicodeDecodeError, ValueError):
+                raise HttpError(400, "body bukan JSON yang valid")
+            if not isinstance(payload, dict):
+                raise HttpError(400, "body JSON harus berupa object")
+            params.update(payload)
+        return handler, params
+
+    def dispatch(self, method, target, body):
+        handler, params = self.route(method, target, body)
+        return handler(method, params)
+
+    async def dispatch_async(self, method, target, body):
+        handler, params = self.route(method, target, body)
+        if handler in self.blocking:
+            return await asyncio.get_running_loop().run_in_executor(None, handler, method, params)
+        return handler(method, params)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                keep_alive = False
+                try:
+                    method, target, version = line.decode('latin-1').split()
+                    headers = {}
+                    while True:
+                        header = await reader.readline()
+                        if header in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = header.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY:
+                        raise HttpError(413, "body terlalu besar")
+                    body = await reader.readexactly(length) if length else b''
+                    keep_alive = (version == 'HTTP/1.1'
+                                  and headers.get('connection', '').lower() != 'close')
+
+                    start = time.perf_counter()
+                    payload = await self.dispatch_async(method.upper(), target, body)
+                    status = 200
+                    payload["took_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except ValueError:
+                    status, payload = 400, {"error": "request tidak valid"}
+                    keep_alive = False
+                except Exception as e:  # jangan sampai satu request mematikan server
+                    status, payload = 500, {"error": str(e)}
+
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                        f"Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch_snapshots(self):
+        """Hot reload: muat snapshot baru di thread terpisah, request tetap dilayani selama memuat"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if self.service.needs_reload():
+                    info = await loop.run_in_executor(None, self.service.reload)
+                    print(f"Indeks dimuat ulang: generasi {info['generation']}, {info['documents']} dokumen")
+            except Exception as e:  # snapshot rusak/terhapus: tetap layani dengan indeks lama
+                print(f"Gagal memuat ulang indeks: {e}")
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Server pencarian aktif di http://{host}:{port} "
+              f"({len(self.service.all_docs)} dokumen, generasi indeks {self.service.generation})")
+        watcher = asyncio.ensure_future(self.watch_snapshots()) if self.reload_interval > 0 else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server pencarian parfum HMNS (HTTP/JSON)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="detik antar pengecekan snapshot indeks baru (0 = hanya lewat /reload)")
+    args = parser.parse_args()
+
+    service = SearchService()
+    try:
+        asyncio.run(SearchServer(service, args.reload_interval).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nServer dihentikan.")
@@ -0,0 +1,283 @@
+
+import os
+import json
+import heapq
+import zlib
+import argparse
+from itertools import islice
+from collections import Counter
+import multiprocessing
+from index_store import INDEX_PATH, IndexReader, open_index, partition_index, read_generation
+from snapshot import resolve_processed_dir, current_snapshot
+from boolean_ir import DiskInvertedIndex, BitmapIndex, eval_boolean_query
+from vsm_ir import TfidfIndex, CorpusStats, DEFAULT_WEIGHTING, WEIGHTINGS
+
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
+SHARD_DIR = os.path.join(BASE_PATH, "data", "index", "shards")
+SHARD_MANIFEST = "shards.json"
+DEFAULT_SHARDS = 4
+
+
+# ------------------------------
+# Pembagian dokumen & build
+# ------------------------------
+def shard_of(doc_id, n_shards):
+    """Nomor shard untuk doc_id (hash stabil, sama di semua proses dan run)"""
+    return zlib.crc32(doc_id.encode('utf-8')) % n_shards
+
+
+def shard_path(shard_dir, i):
+    return os.path.join(shard_dir, f"shard{i:03d}.idx")
+
+
+def index_source(index_path=INDEX_PATH):
+    """Versi korpus sumber shard: nama snapshot aktif dan generasi file indeksnya"""
+    snapshot = current_snapshot(index_path)
+    return {"snapshot": snapshot.name if snapshot is not None else None,
+            "generation": read_generation(index_path)}
+
+
+def build_shards(processed_dir=PROCESSED_DIR, shard_dir=SHARD_DIR, n_shards=DEFAULT_SHARDS, index_path=INDEX_PATH):
+    """Bagi dokumen file indeks aktif ke n_shards file indeks; kembalikan jumlah dokumen per shard"""
+    # versi sumber dicatat sebelum membaca indeks: jika snapshot berganti di tengah build,
+    # manifest menunjuk versi lama sehingga shard dibangun ulang saat dimuat berikutnya
+    source = index_source(index_path)
+    # processed_dir hanya dipakai jika file indeks belum ada sama sekali
+    reader = open_index(index_path, processed_dir)
+    try:
+        if not reader.doc_ids:
+            raise ValueError(f"Indeks {reader.path} tidak berisi dokumen; jalankan preprocessing dulu")
+        os.makedirs(shard_dir, exist_ok=True)
+        paths = [shard_path(shard_dir, i) for i in range(n_shards)]
+        counts = partition_index(reader, paths, lambda doc_id: shard_of(doc_id, n_shards))
+    finally:
+        reader.close()
+
+    names = [os.path.basename(path) for path in paths]
+    for fname in os.listdir(shard_dir):
+        if fname.startswith("shard") and fname.endswith(".idx") and fname not in names:
+            os.remove(os.path.join(shard_dir, fname))
+    manifest_path = os.path.join(shard_dir, SHARD_MANIFEST)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"n_shards": n_shards, "shards": names, "docs": counts, "source": source}, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+    return counts
+
+
+def load_shard_manifest(shard_dir=SHARD_DIR):
+    with open(os.path.join(shard_dir, SHARD_MANIFEST), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def collect_stats(paths):
+    """Pertukaran df/N global: jumlahkan statistik lokal dari kamus tiap shard (postings tidak dibaca)"""
+    N = 0
+    total_length = 0
+    df = Counter()
+    for path in paths:
+        reader = IndexReader(path)
+        try:
+            N += len(reader.doc_ids)
+            total_length += sum(reader.doc_lengths)
+            for term, entry in reader.terms.items():
+                df[term] += entry[0]
+        finally:
+            reader.close()
+    return CorpusStats(N, dict(df), total_length / N if N else 0)
+
+
+# ------------------------------
+# Satu shard
+# ------------------------------
+class Shard:
+    """Indeks VSM + Boolean untuk dokumen satu shard, dengan idf dari statistik global"""
+
+    def __init__(self, path, stats, weighting=DEFAULT_WEIGHTING, index_path=INDEX_PATH):
+        from query_analyzer import get_analyzer
+
+        reader = IndexReader(path)
+        self.generation = reader.generation
+        tf_postings = {term: reader.postings(term) for term in reader.terms}
+        self.engine = TfidfIndex.from_postings(reader.doc_ids, tf_postings, reader.doc_lengths, weighting, stats)
+        # reader tetap terbuka: postings Boolean dibaca dari mmap saat diminta; wildcard/fuzzy
+        # diperluas terhadap kosakata global supaya semua shard memilih term yang sama
+        self.bitmap_index = BitmapIndex(DiskInvertedIndex(reader), sorted(reader.doc_ids), stats.df)
+        # leksikon query ada di samping indeks utama, dipakai bersama semua shard
+        self.analyzer = get_analyzer(index_path)
+        self.engine.analyzer = self.analyzer
+
+    def search(self, query, k=None):
+        return self.engine.search(query, k)
+
+    def boolean(self, query):
+        return eval_boolean_query(query, self.bitmap_index, self.bitmap_index.doc_ids, self.analyzer)
+
+
+def _serve_shard(conn, path, stats, weighting, index_path):
+    """Loop proses worker: memuat satu shard sekali, lalu melayani query dari koordinator"""
+    try:
+        shard = Shard(path, stats, weighting, index_path)
+    except Exception as e:
+        conn.send(("error", e))
+        return
+    conn.send(("ready", None))
+    while True:
+        try:
+            op, args = conn.recv()
+        except EOFError:
+            break
+        if op == "close":
+            break
+        try:
+            conn.send(("ok", getattr(shard, op)(*args)))
+        except Exception as e:  # kesalahan query dikirim balik, worker tetap hidup
+            conn.send(("error", e))
+    conn.close()
+
+
+# ------------------------------
+# Penggabungan hasil
+# ------------------------------
+def _rank_key(hit):
+    # skor menurun; seri diurutkan sesuai urutan dokumen pada indeks tunggal (urut nama file)
+    return -hit[1], hit[0] + '.txt'
+
+
+def merge_ranked(results, k=None):
+    """Gabungkan ranking per shard (masing-masing sudah urut) menjadi ranking global top-k"""
+    merged = heapq.merge(*results, key=_rank_key)
+    return list(merged if k is None else islice(merged, k))
+
+
+def merge_boolean(results):
+    """Gabungan hasil Boolean per shard; dokumen tiap shard terpisah, cukup merge urut doc_id"""
+    return list(heapq.merge(*results))
+
+
+class ShardedIndex:
+    """Koordinator scatter-gather: query dikirim ke semua shard sekaligus, hasilnya digabung"""
+
+    def __init__(self, shard_dir=SHARD_DIR, weighting=DEFAULT_WEIGHTING, index_path=INDEX_PATH,
+                 processed_dir=PROCESSED_DIR, n_shards=None, parallel=True):
+        # n_shards None: pakai jumlah shard yang sudah ada (atau DEFAULT_SHARDS jika belum ada)
+        manifest = None
+        if os.path.exists(os.path.join(shard_dir, SHARD_MANIFEST)):
+            manifest = load_shard_manifest(shard_dir)
+            if manifest.get("source") != index_source(index_path):
+                # preprocessing sudah mempublikasikan snapshot baru: shard lama tidak dipakai
+                print(f"Shard di {shard_dir} dibangun dari versi indeks lain, dibangun ulang ...")
+                n_shards = n_shards or manifest["n_shards"]
+                manifest = None
+            elif n_shards is not None and manifest["n_shards"] != n_shards:
+                print(f"Shard di {shard_dir} berjumlah {manifest['n_shards']}, dibangun ulang menjadi {n_shards} ...")
+                manifest = None
+        if manifest is None:
+            build_shards(resolve_processed_dir(processed_dir, index_path), shard_dir, n_shards or DEFAULT_SHARDS,
+                         index_path=index_path)
+            manifest = load_shard_manifest(shard_dir)
+        self.paths = [os.path.join(shard_dir, name) for name in manifest["shards"]]
+        self.weighting = weighting
+        self.stats = collect_stats(self.paths)
+        self.N = self.stats.N
+        self.parallel = parallel
+        self._shards = []
+        self._workers = []
+        if not parallel:
+            self._shards = [Shard(path, self.stats, weighting, index_path) for path in self.paths]
+            return
+
+        # satu proses per shard: tiap proses hanya memegang postings shard-nya sendiri
+        try:
+            for path in self.paths:
+                parent, child = multiprocessing.Pipe()
+                proc = multiprocessing.Process(target=_serve_shard, daemon=True,
+                                               args=(child, path, self.stats, weighting, index_path))
+                proc.start()
+                child.close()
+                self._workers.append((proc, parent))
+            for _, conn in self._workers:
+                status, error = conn.recv()
+                if status == "error":
+                    raise error
+        except BaseException:
+            self.close()
+            raise
+
+    def _scatter(self, op, *args):
+        if not self.parallel:
+            return [getattr(shard, op)(*args) for shard in self._shards]
+        for _, conn in self._workers:
+            conn.send((op, args))
+        results = []
+        error = None
+        # semua balasan tetap dibaca supaya pipe tidak menyisakan jawaban lama
+        for _, conn in self._workers:
+            status, value = conn.recv()
+            if status == "error":
+                error = value
+            results.append(value)
+        if error is not None:
+            raise error
+        return results
+
+    def search(self, query, k=None):
+        """Ranking VSM global: top-k tiap shard lalu digabung"""
+        return merge_ranked(self._scatter("search", query, k), k)
+
+    def boolean(self, query):
+        return merge_boolean(self._scatter("boolean", query))
+
+    def close(self):
+        for proc, conn in self._workers:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc, _ in self._workers:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._workers = []
+        self._shards = []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indeks multi-shard dengan query scatter-gather paralel")
+    parser.add_argument("--build", action="store_true", help="bangun ulang shard dari file indeks aktif")
+    parser.add_argument("--shards", type=int, default=None,
+                        help=f"jumlah shard (default: jumlah shard yang ada, atau {DEFAULT_SHARDS})")
+    parser.add_argument("--shard-dir", default=SHARD_DIR)
+    parser.add_argument("--weighting", default=DEFAULT_WEIGHTING, choices=sorted(WEIGHTINGS))
+    parser.add_argument("--boolean", action="store_true", help="query Boolean (default: VSM)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--in-process", action="store_true", help="jalankan semua shard di proses ini")
+    args = parser.parse_args()
+
+    try:
+        if args.build:
+            counts = build_shards(resolve_processed_dir(PROCESSED_DIR, INDEX_PATH), args.shard_dir,
+                                  args.shards or DEFAULT_SHARDS)
+            print(f"{len(counts)} shard ditulis ke {args.shard_dir} (dokumen per shard: {counts})")
+        index = ShardedIndex(args.shard_dir, args.weighting, n_shards=args.shards, parallel=not args.in_process)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"{len(index.paths)} shard dimuat, {index.N} dokumen, {len(index.stats.df)} term")
+    try:
+        while True:
+            query = input("\nMasukkan query (ketik 'exit' untuk keluar): ").lower()
+            if query == "exit":
+                break
+            try:
+                if args.boolean:
+                    print("Dokumen cocok:", index.boolean(query))
+                else:
+                    for doc, score in index.search(query, args.k):
+                        print(f"{doc}: {score:.4f}")
+            except ValueError as e:
+                print(f"Query tidak valid: {e}")
+    finally:
+        index.close()
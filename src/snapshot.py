@@ -0,0 +1,154 @@
+
+import os
+import re
+import shutil
+import tempfile
+
+# Tata letak (relatif terhadap folder file indeks, mis. data/index/):
+#   CURRENT                 : nama snapshot aktif, diganti secara atomik (os.replace)
+#   snapshots/v000001/      : file indeks, leksikon, manifest, dan processed/*.txt satu versi
+#   snapshots/.staging-*/   : snapshot yang sedang dibangun, belum terlihat oleh pembaca
+# Snapshot yang sudah dipublikasikan tidak pernah ditulis ulang; file yang tidak berubah
+# di-hardlink dari snapshot sebelumnya sehingga build inkremental tetap murah.
+SNAPSHOT_DIRNAME = "snapshots"
+CURRENT_FILE = "CURRENT"
+KEEP_SNAPSHOTS = 3  # snapshot lama disisakan untuk pembaca yang masih memakainya
+_VERSION = re.compile(r'v(\d+)$')
+
+
+class Snapshot:
+    """Satu versi indeks yang sudah dipublikasikan (tidak berubah lagi)"""
+
+    def __init__(self, path, index_name):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.index_path = os.path.join(path, index_name)
+        self.processed_dir = os.path.join(path, "processed")
+
+    def __repr__(self):
+        return f"Snapshot({self.name!r})"
+
+
+def snapshot_root(index_path):
+    return os.path.join(os.path.dirname(index_path), SNAPSHOT_DIRNAME)
+
+
+def current_snapshot(index_path):
+    """Snapshot yang ditunjuk CURRENT di samping index_path; None jika belum ada"""
+    try:
+        with open(os.path.join(os.path.dirname(index_path), CURRENT_FILE), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(snapshot_root(index_path), name)
+    if not name or not os.path.isdir(path):
+        return None
+    return Snapshot(path, os.path.basename(index_path))
+
+
+def resolve_index_path(index_path):
+    """File indeks yang aktif: milik snapshot CURRENT jika ada, selain itu index_path apa adanya"""
+    snapshot = current_snapshot(index_path)
+    return snapshot.index_path if snapshot is not None else index_path
+
+
+def resolve_processed_dir(processed_dir, index_path):
+    snapshot = current_snapshot(index_path)
+    if snapshot is not None and os.path.isdir(snapshot.processed_dir):
+        return snapshot.processed_dir
+    return processed_dir
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _versions(root):
+    versions = []
+    for name in os.listdir(root):
+        m = _VERSION.match(name)
+        if m:
+            versions.append((int(m.group(1)), name))
+    return sorted(versions)
+
+
+class SnapshotBuilder:
+    """Bangun snapshot baru di folder staging; publish() menukar pointer CURRENT secara atomik"""
+
+    def __init__(self, index_path):
+        self.base = current_snapshot(index_path)
+        self.root = snapshot_root(index_path)
+        os.makedirs(self.root, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        self.index_path = os.path.join(self.path, os.path.basename(index_path))
+        self.processed_dir = os.path.join(self.path, "processed")
+        os.makedirs(self.processed_dir)
+        self.published = None
+
+        # file indeks dasar: generasi snapshot baru melanjutkan generasi sebelumnya
+        base_index = self.base.index_path if self.base is not None else index_path
+        if os.path.exists(base_index):
+            _link_or_copy(base_index, self.index_path)
+
+    def seed_processed(self):
+        """Hardlink teks hasil preprocessing dari snapshot sebelumnya (tidak disalin)"""
+        if self.base is None or not os.path.isdir(self.base.processed_dir):
+            return 0
+        n = 0
+        for fname in os.listdir(self.base.processed_dir):
+            _link_or_copy(os.path.join(self.base.processed_dir, fname), os.path.join(self.processed_dir, fname))
+            n += 1
+        return n
+
+    def write_text(self, fname, text):
+        # file bisa berupa hardlink ke snapshot lama: tulis ke file baru lalu ganti, jangan ditimpa di tempat
+        path = os.path.join(self.processed_dir, fname)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def remove_text(self, fname):
+        path = os.path.join(self.processed_dir, fname)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def publish(self, keep=KEEP_SNAPSHOTS):
+        """Pindahkan staging ke snapshots/vNNNNNN lalu arahkan CURRENT ke sana"""
+        while True:
+            versions = _versions(self.root)
+            name = f"v{(versions[-1][0] if versions else 0) + 1:06d}"
+            try:
+                os.rename(self.path, os.path.join(self.root, name))
+                break
+            except OSError:
+                # build lain mempublikasikan nomor yang sama lebih dulu, coba nomor berikutnya
+                if not os.path.exists(os.path.join(self.root, name)):
+                    raise
+
+        current_path = os.path.join(os.path.dirname(self.root), CURRENT_FILE)
+        tmp_path = current_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(name + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, current_path)
+        self.path = os.path.join(self.root, name)
+        self.published = Snapshot(self.path, os.path.basename(self.index_path))
+        prune_snapshots(self.root, name, keep)
+        return self.published
+
+    def discard(self):
+        if self.published is None:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def prune_snapshots(root, current_name, keep=KEEP_SNAPSHOTS):
+    """Hapus snapshot tertua, sisakan `keep` versi terbaru (snapshot aktif tidak pernah dihapus)"""
+    # pembaca yang memegang mmap file indeks lama tidak terganggu: isi file tetap ada sampai ditutup
+    for _, name in _versions(root)[:-keep]:
+        if name != current_name:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
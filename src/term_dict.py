@@ -0,0 +1,135 @@
+
+import re
+from array import array
+from bisect import bisect_left
+
+WILDCARD = '*'
+_FUZZY = re.compile(r'^(.+)~(\d*)$')
+
+# VSM: term query yang tidak ada di kamus dikoreksi ke term terdekat (mis. "vanila" -> "vanilla") dan koreksinya
+# ditampilkan; Boolean tidak pernah mengoreksi diam-diam ('not vanila' bisa berubah arti), hanya lewat '~' eksplisit
+FUZZY_UNKNOWN_TERMS = True
+
+
+def default_max_edits(word):
+    """Batas jarak Levenshtein menurut panjang kata: kata pendek tidak dikoreksi"""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def is_pattern(token):
+    """True untuk token wildcard ('sandal*') atau fuzzy ('vanila~', 'vanila~2')"""
+    return token.endswith(WILDCARD) or _FUZZY.match(token) is not None
+
+
+def parse_fuzzy(token):
+    """'vanila~2' -> ('vanila', 2); 'vanila~' -> ('vanila', batas bawaan); None jika bukan fuzzy"""
+    m = _FUZZY.match(token)
+    if m is None:
+        return None
+    word = m.group(1)
+    return word, int(m.group(2)) if m.group(2) else default_max_edits(word)
+
+
+class TermDictionary:
+    """Kamus term terurut sebagai trie pre-order dalam array (satu karakter per simpul)"""
+
+    def __init__(self, terms):
+        # terms harus urut: simpul ditambahkan dalam urutan pre-order, subtree selalu berurutan
+        self.terms = list(terms)
+        labels = ['\0']  # akar tidak punya label
+        self._term_id = array('l', [-1])
+        self._end = array('l', [0])  # indeks simpul setelah subtree simpul ini
+        stack = [0]
+        prev = ''
+        for term_id, term in enumerate(self.terms):
+            common = 0
+            limit = min(len(prev), len(term))
+            while common < limit and prev[common] == term[common]:
+                common += 1
+            while len(stack) > common + 1:
+                self._end[stack.pop()] = len(labels)
+            for ch in term[common:]:
+                stack.append(len(labels))
+                labels.append(ch)
+                self._term_id.append(-1)
+                self._end.append(0)
+            self._term_id[stack[-1]] = term_id
+            prev = term
+        while stack:
+            self._end[stack.pop()] = len(labels)
+        self._labels = ''.join(labels)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        i = bisect_left(self.terms, term)
+        return i < len(self.terms) and self.terms[i] == term
+
+    def _children(self, node):
+        child = node + 1
+        end = self._end[node]
+        while child < end:
+            yield child
+            child = self._end[child]
+
+    def _find(self, prefix):
+        node = 0
+        labels = self._labels
+        for ch in prefix:
+            for child in self._children(node):
+                if labels[child] == ch:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def prefix(self, prefix):
+        """Semua term berawalan prefix (urut abjad); biaya sebanding dengan jumlah hasil"""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        term_id = self._term_id
+        return [self.terms[term_id[i]] for i in range(node, self._end[node]) if term_id[i] >= 0]
+
+    def fuzzy(self, word, max_edits):
+        """[(jarak, term)] dengan jarak Levenshtein <= max_edits, urut jarak lalu abjad"""
+        # automaton Levenshtein disimulasikan baris DP per simpul trie; cabang dipangkas begitu
+        # semua sel barisnya > max_edits, sehingga hanya bagian trie di sekitar hasil yang dikunjungi
+        labels = self._labels
+        term_id = self._term_id
+        n = len(word)
+        results = []
+        stack = [(child, range(n + 1)) for child in self._children(0)]
+        while stack:
+            node, prev = stack.pop()
+            ch = labels[node]
+            row = [prev[0] + 1]
+            for j in range(1, n + 1):
+                row.append(min(row[j - 1] + 1, prev[j] + 1, prev[j - 1] + (word[j - 1] != ch)))
+            if row[n] <= max_edits and term_id[node] >= 0:
+                results.append((row[n], self.terms[term_id[node]]))
+            if min(row) <= max_edits:
+                stack.extend((child, row) for child in self._children(node))
+        results.sort()
+        return results
+
+    def expand(self, token, correct_unknown=False):
+        """Token query -> daftar term kamus: wildcard, fuzzy eksplisit, atau (correct_unknown) koreksi term
+        yang tidak dikenal"""
+        if token.endswith(WILDCARD):
+            prefix = token.rstrip(WILDCARD)
+            return self.prefix(prefix) if prefix else []
+        fuzzy = parse_fuzzy(token)
+        if fuzzy is not None:
+            return [term for _, term in self.fuzzy(*fuzzy)]
+        if token in self:
+            return [token]
+        if correct_unknown:
+            matches = self.fuzzy(token, default_max_edits(token))
+            # hanya koreksi terdekat, supaya salah ketik tidak melebar ke banyak term
+            return [term for dist, term in matches if dist == matches[0][0]]
+        return []
@@ -1,14 +1,44 @@
 
 import os
 import math
+import heapq
+from bisect import bisect_left
 from collections import Counter
+import instrument
+from index_store import INDEX_PATH, open_index, index_version
+from snapshot import resolve_processed_dir
+from term_dict import TermDictionary, FUZZY_UNKNOWN_TERMS, is_pattern
+
+# numpy/scipy hanya dimuat saat mode matriks dipakai (opsional, dan impornya lambat)
+np = None
+sparse = None
+
+def _load_matrix_backend():
+    global np, sparse
+    if np is None or sparse is None:
+        try:
+            import numpy
+            from scipy import sparse as scipy_sparse
+        except ImportError:
+            raise ImportError("Mode matriks membutuhkan numpy dan scipy (pip install numpy scipy)")
+        np, sparse = numpy, scipy_sparse
 
 
 BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 PROCESSED_DIR = os.path.join(BASE_PATH, "data", "processed")
 
+# toleransi pembulatan saat membandingkan batas atas skor dengan ambang top-k
+PRUNE_EPS = 1e-9
+MATRIX_BATCH = 256  # jumlah query per perkalian matriks (membatasi matriks skor dense)
+
 
-def load_documents(processed_dir=PROCESSED_DIR):
+def _processed_dir(processed_dir):
+    # default: teks hasil preprocessing snapshot aktif (data/processed hanya jika belum ada snapshot)
+    return resolve_processed_dir(PROCESSED_DIR, INDEX_PATH) if processed_dir is None else processed_dir
+
+
+def load_documents(processed_dir=None):
+    processed_dir = _processed_dir(processed_dir)
     docs = {}
     for fname in sorted(os.listdir(processed_dir)):
         if fname.endswith('.txt'):
@@ -29,20 +59,26 @@ def build_vocabulary(docs):
     return sorted(list(vocab)), df
 
 
+def iter_documents(processed_dir=None):
+    """Baca dokumen satu per satu sebagai (doc_id, tokens) tanpa menampung seluruh korpus"""
+    processed_dir = _processed_dir(processed_dir)
+    for fname in sorted(os.listdir(processed_dir)):
+        if fname.endswith('.txt'):
+            with open(os.path.join(processed_dir, fname), 'r', encoding='utf-8') as f:
+                yield fname.replace('.txt', ''), f.read().split()
+
+
 def compute_tfidf(docs, vocab, df):
+    # vektor sparse: hanya term yang muncul di dokumen yang disimpan
     N = len(docs)
     tfidf = {}
 
     for doc_id, tokens in docs.items():
         tf = Counter(tokens)
         weights = {}
-        for term in vocab:
-            if term in tf:
-                tf_val = tf[term]
-                idf_val = math.log(N / (1 + df[term]))  # +1 untuk menghindari div 0
-                weights[term] = tf_val * idf_val
-            else:
-                weights[term] = 0
+        for term in sorted(tf):
+            idf_val = math.log(N / (1 + df[term]))  # +1 untuk menghindari div 0
+            weights[term] = tf[term] * idf_val
         tfidf[doc_id] = weights
     return tfidf
 
@@ -50,18 +86,18 @@ def compute_tfidf(docs, vocab, df):
 def build_query_vector(query, vocab, df, N):
     q_tokens = query.lower().split()
     q_tf = Counter(q_tokens)
+    vocab = vocab if isinstance(vocab, (set, dict)) else set(vocab)
     q_vec = {}
-    for term in vocab:
-        if term in q_tf:
+    for term in sorted(q_tf):
+        if term in vocab:
             idf_val = math.log(N / (1 + df.get(term, 0)))
             q_vec[term] = q_tf[term] * idf_val
-        else:
-            q_vec[term] = 0
     return q_vec
 
 
 def cosine_similarity(vec1, vec2):
-    dot = sum(vec1[t] * vec2[t] for t in vec1)
+    # vektor sparse: term yang tidak ada dianggap berbobot 0
+    dot = sum(vec1[t] * vec2.get(t, 0) for t in vec1)
     norm1 = math.sqrt(sum(v * v for v in vec1.values()))
     norm2 = math.sqrt(sum(v * v for v in vec2.values()))
     if norm1 == 0 or norm2 == 0:
@@ -69,17 +105,492 @@ def cosine_similarity(vec1, vec2):
     return dot / (norm1 * norm2)
 
 
-def rank_documents(query, docs, vocab, df):
-    N = len(docs)
-    tfidf = compute_tfidf(docs, vocab, df)
-    q_vec = build_query_vector(query, vocab, df, N)
+def rank_documents(query, docs, vocab, df, top_k=None):
+    # Untuk banyak query, bangun TfidfIndex sekali (atau pakai get_engine) lalu panggil search()
+    return TfidfIndex(docs, vocab, df).search(query, k=top_k)
+
+
+# ------------------------------
+# Skema pembobotan (pluggable)
+# ------------------------------
+class TfidfWeighting:
+    """Bobot bawaan: tf mentah x log(N/(1+df)), skor cosine"""
+    name = "tfidf"
+    normalize = True  # True: skor dibagi norma vektor dokumen & query (cosine)
+
+    def idf(self, N, df):
+        return math.log(N / (1 + df))  # +1 untuk menghindari div 0
+
+    def doc_factors(self, doc_lengths, avgdl=None):
+        """Faktor per dokumen yang dihitung sekali saat indeks dibangun"""
+        return [None] * len(doc_lengths)
+
+    def doc_weight(self, count, idf, factor):
+        return count * idf
+
+    def query_weight(self, count, idf):
+        return count * idf
+
+
+class LogTfWeighting(TfidfWeighting):
+    """(1 + log tf) x log(N/(1+df)), skor cosine"""
+    name = "logtf"
+
+    def doc_weight(self, count, idf, factor):
+        return (1 + math.log(count)) * idf
+
+    def query_weight(self, count, idf):
+        return (1 + math.log(count)) * idf
+
+
+class Bm25Weighting(TfidfWeighting):
+    """Okapi BM25: normalisasi panjang dokumen sudah masuk ke bobot, tanpa cosine"""
+    name = "bm25"
+    normalize = False
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+    def idf(self, N, df):
+        return math.log(1 + (N - df + 0.5) / (df + 0.5))
+
+    def doc_factors(self, doc_lengths, avgdl=None):
+        # k1 * (1 - b + b * |d| / avgdl) per dokumen, dihitung sekali saat indeks dibangun
+        if avgdl is None:
+            avgdl = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0
+        if avgdl == 0:
+            return [self.k1] * len(doc_lengths)
+        return [self.k1 * (1 - self.b + self.b * length / avgdl) for length in doc_lengths]
+
+    def doc_weight(self, count, idf, factor):
+        return idf * count * (self.k1 + 1) / (count + factor)
+
+    def query_weight(self, count, idf):
+        return count
+
+
+class Bm25PlusWeighting(Bm25Weighting):
+    """BM25+ (Lv & Zhai): tambahan delta agar dokumen panjang tidak terlalu dihukum"""
+    name = "bm25+"
+
+    def __init__(self, k1=1.2, b=0.75, delta=1.0):
+        super().__init__(k1, b)
+        self.delta = delta
+
+    def idf(self, N, df):
+        return math.log((N + 1) / df)
+
+    def doc_weight(self, count, idf, factor):
+        return idf * (count * (self.k1 + 1) / (count + factor) + self.delta)
+
+
+WEIGHTINGS = {
+    "tfidf": TfidfWeighting,
+    "logtf": LogTfWeighting,
+    "bm25": Bm25Weighting,
+    "bm25+": Bm25PlusWeighting,
+}
+DEFAULT_WEIGHTING = "tfidf"
+
+
+def get_weighting(weighting=DEFAULT_WEIGHTING):
+    """Nama skema (lihat WEIGHTINGS) atau objek pembobotan -> objek pembobotan"""
+    if not isinstance(weighting, str):
+        return weighting
+    try:
+        return WEIGHTINGS[weighting]()
+    except KeyError:
+        raise ValueError(f"Skema pembobotan tidak dikenal: {weighting} (pilihan: {', '.join(WEIGHTINGS)})")
+
+
+class CorpusStats:
+    """Statistik koleksi global (N, df, rata-rata panjang dokumen) untuk indeks yang hanya memuat sebagian dokumen"""
+
+    def __init__(self, N, df, avgdl):
+        self.N = N
+        self.df = df
+        self.avgdl = avgdl
+
+
+# ------------------------------
+# Engine VSM bersama
+# ------------------------------
+class TfidfIndex:
+    """Indeks VSM berbasis postings (term -> [(docno, bobot)]) yang dibangun sekali"""
+
+    def __init__(self, docs, vocab=None, df=None, weighting=DEFAULT_WEIGHTING):
+        items = docs.items() if isinstance(docs, dict) else docs
+        self.doc_ids = []
+        self.doc_lengths = []
+        tf_postings = {}
+        for doc_id, tokens in items:
+            docno = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.doc_lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                tf_postings.setdefault(term, []).append((docno, count))
+        self.weighting = get_weighting(weighting)
+        self._build(tf_postings, vocab, df)
+
+    @classmethod
+    def from_postings(cls, doc_ids, tf_postings, doc_lengths=None, weighting=DEFAULT_WEIGHTING, stats=None):
+        """Bangun indeks dari postings tf (term -> [(docno, tf)]) yang sudah ada"""
+        # stats (CorpusStats): idf & normalisasi panjang memakai statistik global, mis. untuk satu shard
+        index = cls.__new__(cls)
+        index.doc_ids = list(doc_ids)
+        if doc_lengths is None:
+            doc_lengths = [0] * len(index.doc_ids)
+            for plist in tf_postings.values():
+                for docno, count in plist:
+                    doc_lengths[docno] += count
+        index.doc_lengths = list(doc_lengths)
+        index.weighting = get_weighting(weighting)
+        index._build(tf_postings, None, None, stats)
+        return index
+
+    @classmethod
+    def from_index_file(cls, index_path=INDEX_PATH, processed_dir=PROCESSED_DIR, weighting=DEFAULT_WEIGHTING):
+        reader = open_index(index_path, processed_dir)
+        try:
+            tf_postings = {term: reader.postings(term) for term in reader.terms}
+            index = cls.from_postings(reader.doc_ids, tf_postings, reader.doc_lengths, weighting)
+            index.generation = reader.generation
+            index.version = reader.version
+            return index
+        finally:
+            reader.close()
+
+    def _build(self, tf_postings, vocab, df, stats=None):
+        with instrument.timer("vsm.index_build"):
+            self._build_postings(tf_postings, vocab, df, stats)
+
+    def _build_postings(self, tf_postings, vocab, df, stats=None):
+        self.generation = 0
+        self.version = None  # identitas file indeks sumber (index_version), None untuk indeks di memori
+        self.analyzer = None  # QueryAnalyzer opsional (diisi get_engine)
+        self._term_dict = None
+        self._matrix = None
+        n_docs = len(self.doc_ids)
+        self.N = stats.N if stats is not None else n_docs
+        self.doc_pos = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        self.vocab = vocab if vocab is not None else sorted(tf_postings)
+        if stats is not None:
+            self.df = stats.df
+        else:
+            self.df = df if df is not None else Counter({t: len(p) for t, p in tf_postings.items()})
+        weighting = self.weighting
+        # dengan statistik global idf mencakup seluruh kosakata, supaya norma query sama di semua shard
+        self.idf = {term: weighting.idf(self.N, self.df[term])
+                    for term in (self.df if stats is not None else tf_postings)}
+
+        # term diproses urut abjad supaya norma dijumlahkan dengan urutan yang sama
+        # seperti cosine_similarity pada vektor penuh (hasil identik sampai bit terakhir)
+        self.postings = {}
+        sq_norms = [0] * n_docs
+        factors = weighting.doc_factors(self.doc_lengths, stats.avgdl if stats is not None else None)
+        doc_weight = weighting.doc_weight
+        for term in sorted(tf_postings):
+            idf_val = self.idf[term]
+            plist = [(docno, doc_weight(count, idf_val, factors[docno])) for docno, count in tf_postings[term]]
+            for docno, w in plist:
+                sq_norms[docno] += w * w
+            self.postings[term] = plist
+        if weighting.normalize:
+            self.norms = [math.sqrt(v) for v in sq_norms]
+        else:
+            self.norms = [1.0] * n_docs
+        self.inv_norms = [1 / n if n else 0 for n in self.norms]
+
+        # batas atas/bawah bobot ter-normalisasi per term untuk pruning top-k (MaxScore)
+        self.max_w = {}
+        self.min_w = {}
+        for term, plist in self.postings.items():
+            nws = [w / self.norms[docno] if self.norms[docno] != 0 else 0 for docno, w in plist]
+            self.max_w[term] = max(nws)
+            self.min_w[term] = min(nws)
+
+    @classmethod
+    def from_folder(cls, processed_dir=None):
+        return cls(iter_documents(processed_dir))
+
+    def query_terms(self, query):
+        if self.analyzer is not None:
+            return self.analyzer.analyze(query)
+        return query.lower().split()
+
+    @property
+    def term_dict(self):
+        """Kamus term (trie) untuk wildcard/fuzzy, dibangun saat pertama dipakai"""
+        if self._term_dict is None:
+            self._term_dict = TermDictionary(sorted(self.idf))
+        return self._term_dict
+
+    @property
+    def matrix(self):
+        """MatrixTfidfIndex untuk indeks ini, dibangun sekali saat pertama dipakai (ImportError tanpa numpy/scipy)"""
+        # dipakai ulang oleh evaluasi berikutnya (mis. /evaluate di server) selama engine yang sama aktif
+        if self._matrix is None:
+            self._matrix = MatrixTfidfIndex(self)
+        return self._matrix
+
+    def query_counts(self, query):
+        """Frekuensi term query; term wildcard/fuzzy/tidak dikenal diperluas lewat kamus term"""
+        q_tf = Counter()
+        for term in self.query_terms(query):
+            if term in self.idf:
+                q_tf[term] += 1
+            else:
+                q_tf.update(self.term_dict.expand(term, correct_unknown=FUZZY_UNKNOWN_TERMS))
+        return q_tf
+
+    def corrections(self, query):
+        """Koreksi otomatis term query yang tidak dikenal, untuk ditampilkan: {term: [term kamus]}"""
+        result = {}
+        if not FUZZY_UNKNOWN_TERMS:
+            return result
+        for term in self.query_terms(query):
+            if term not in self.idf and not is_pattern(term) and term not in result:
+                matches = self.term_dict.expand(term, correct_unknown=True)
+                if matches:
+                    result[term] = matches
+        return result
+
+    def query_vector(self, query):
+        q_tf = self.query_counts(query)
+        query_weight = self.weighting.query_weight
+        return {term: query_weight(q_tf[term], self.idf[term]) for term in sorted(q_tf) if term in self.idf}
+
+    def query_norm(self, q_vec):
+        if not self.weighting.normalize:
+            return 1.0 if q_vec else 0
+        return math.sqrt(sum(v * v for v in q_vec.values()))
+
+    def _local_terms(self, q_vec):
+        # term query yang tidak punya postings di indeks ini (shard) tidak menyumbang skor
+        if len(self.idf) == len(self.postings):
+            return q_vec
+        return {term: w for term, w in q_vec.items() if term in self.postings}
+
+    def score_all(self, q_vec):
+        """Term-at-a-time: akumulasi skor hanya dari postings term query"""
+        q_norm = self.query_norm(q_vec)
+        if q_norm == 0:
+            return {}
+        q_vec = self._local_terms(q_vec)
+        acc = {}
+        for term, q_w in q_vec.items():
+            for docno, d_w in self.postings[term]:
+                acc[docno] = acc.get(docno, 0) + q_w * d_w
+        if instrument.ENABLED:
+            instrument.count("vsm.postings_touched", sum(len(self.postings[t]) for t in q_vec))
+            instrument.count("vsm.documents_scored", len(acc))
+        if not self.weighting.normalize:
+            # BM25: bobot dokumen sudah final, skor = jumlah kontribusi postings tanpa norma
+            doc_ids = self.doc_ids
+            return {doc_ids[docno]: dot for docno, dot in acc.items()}
+        scores = {}
+        for docno, dot in acc.items():
+            d_norm = self.norms[docno]
+            scores[self.doc_ids[docno]] = dot / (q_norm * d_norm) if d_norm != 0 else 0
+        return scores
+
+    def top_k(self, q_vec, k):
+        """Top-k dokumen berskor > 0: term-at-a-time dengan pruning MaxScore"""
+        q_norm = self.query_norm(q_vec)
+        if q_norm == 0 or k <= 0:
+            return []
+        q_vec = self._local_terms(q_vec)
+        inv_norms = self.inv_norms
+
+        # batas kontribusi ter-normalisasi tiap term; dokumen tanpa term itu menyumbang 0
+        scale = {t: q_w / q_norm for t, q_w in q_vec.items()}
+        hi = {t: max(scale[t] * self.max_w[t], scale[t] * self.min_w[t], 0) for t in q_vec}
+        lo = {t: min(scale[t] * self.max_w[t], scale[t] * self.min_w[t], 0) for t in q_vec}
+        # term berdampak besar (jarang) diproses dulu; term umum di akhir cukup dicek untuk kandidat
+        terms = sorted(q_vec, key=lambda t: hi[t], reverse=True)
+        rest_hi = [0] * (len(terms) + 1)
+        rest_lo = [0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            rest_hi[i] = rest_hi[i + 1] + hi[terms[i]]
+            rest_lo[i] = rest_lo[i + 1] + lo[terms[i]]
+
+        acc = {}
+        closed = False  # True: dokumen baru tidak mungkin lagi masuk top-k
+        touched = 0
+        for i, t in enumerate(terms):
+            s, plist = scale[t], self.postings[t]
+            if not closed:
+                get = acc.get
+                for docno, w in plist:
+                    acc[docno] = get(docno, 0) + s * w * inv_norms[docno]
+                touched += len(plist)
+            elif len(acc) * len(plist).bit_length() < len(plist):
+                # kandidat jauh lebih sedikit dari postings: cari tiap kandidat dengan bisect
+                j = 0
+                for docno in sorted(acc):
+                    j = bisect_left(plist, (docno,), j)
+                    if j < len(plist) and plist[j][0] == docno:
+                        acc[docno] += s * plist[j][1] * inv_norms[docno]
+                touched += len(acc)
+            else:
+                for docno, w in plist:
+                    if docno in acc:
+                        acc[docno] += s * w * inv_norms[docno]
+                touched += len(plist)
+
+            upper = rest_hi[i + 1]
+            if upper == 0 and not closed:
+                closed = True  # sisa term tidak bisa membuat skor dokumen baru > 0
+            if i + 1 == len(terms):
+                break
+            floor = 0
+            if len(acc) >= k:
+                # skor akhir minimal dokumen ke-k: skor parsial + batas bawah sisa term
+                floor = max(floor, heapq.nlargest(k, acc.values())[-1] + rest_lo[i + 1])
+                if upper <= floor - PRUNE_EPS:
+                    closed = True
+            if closed:
+                limit = floor - PRUNE_EPS - upper
+                acc = {docno: v for docno, v in acc.items() if v > limit}
+
+        # skor parsial dijumlahkan dengan urutan lain; hanya dokumen di sekitar batas top-k
+        # yang dihitung ulang dengan urutan score_all, supaya skor identik dengan ranking penuh
+        if len(acc) > k:
+            kth = heapq.nlargest(k, acc.values())[-1]
+            candidates = [docno for docno, v in acc.items() if v >= kth - PRUNE_EPS]
+        else:
+            candidates = list(acc)
+        hits = []
+        for docno in candidates:
+            score = self._exact_score(q_vec, q_norm, docno)
+            if score > 0:
+                hits.append((score, -docno))
+
+        if instrument.ENABLED:
+            instrument.count("vsm.postings_touched", touched)
+            instrument.count("vsm.documents_scored", len(candidates))
+        return [(self.doc_ids[-neg], score) for score, neg in heapq.nlargest(k, hits)]
+
+    def _exact_score(self, q_vec, q_norm, docno):
+        # urutan penjumlahan sama dengan score_all agar skor identik
+        if self.norms[docno] == 0:
+            return 0
+        dot = 0
+        for term, q_w in q_vec.items():
+            plist = self.postings[term]
+            i = bisect_left(plist, (docno,))
+            if i < len(plist) and plist[i][0] == docno:
+                dot = dot + q_w * plist[i][1]
+        return dot / (q_norm * self.norms[docno])
+
+    def exhaustive_top_k(self, q_vec, k):
+        """Top-k tanpa pruning (score_all + heap), pembanding untuk benchmark"""
+        scores = self.score_all(q_vec)
+        doc_pos = self.doc_pos
+        best = heapq.nlargest(k, ((score, -doc_pos[doc]) for doc, score in scores.items() if score > 0))
+        return [(self.doc_ids[-neg], score) for score, neg in best]
+
+    def search(self, query, k=None):
+        """Ranking dokumen untuk query; k=None mengembalikan semua dokumen, k=n hanya top-n berskor > 0"""
+        if instrument.ENABLED:
+            instrument.count("vsm.queries")
+        with instrument.timer("vsm.query_vector"):
+            q_vec = self.query_vector(query)
+        if k is not None:
+            with instrument.timer("vsm.top_k"):
+                return self.top_k(q_vec, k)
+
+        # dokumen tanpa term query berskor 0; urutannya mengikuti urutan dokumen
+        with instrument.timer("vsm.score"):
+            scores = self.score_all(q_vec)
+        with instrument.timer("vsm.sort"):
+            ranked = sorted(((d, scores.get(d, 0)) for d in self.doc_ids),
+                            key=lambda x: x[1], reverse=True)
+        return ranked
+
+
+class MatrixTfidfIndex:
+    """Mode matriks (numpy/scipy): matriks CSR dokumen x term (baris ter-normalisasi L2 untuk cosine)"""
+
+    def __init__(self, index):
+        _load_matrix_backend()
+        self.index = index
+        self.doc_ids = list(index.doc_ids)
+        self.term_ids = {term: i for i, term in enumerate(sorted(index.postings))}
+        self.idf = np.array([index.idf[t] for t in sorted(index.postings)], dtype=np.float64)
+
+        rows, cols, data = [], [], []
+        for term, plist in index.postings.items():
+            col = self.term_ids[term]
+            for docno, w in plist:
+                d_norm = index.norms[docno]
+                rows.append(docno)
+                cols.append(col)
+                data.append(w / d_norm if d_norm != 0 else 0.0)
+        self.matrix = sparse.csr_matrix(
+            (data, (rows, cols)), shape=(len(self.doc_ids), len(self.term_ids)), dtype=np.float64)
+
+    def query_matrix(self, queries):
+        """Bangun matriks query (Q x V), baris ter-normalisasi L2 jika skemanya cosine"""
+        weighting = self.index.weighting
+        rows, cols, data = [], [], []
+        for i, query in enumerate(queries):
+            for term, count in self.index.query_counts(query).items():
+                col = self.term_ids.get(term)
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+                    data.append(weighting.query_weight(count, float(self.idf[col])))
+        q = sparse.csr_matrix(
+            (data, (rows, cols)), shape=(len(queries), len(self.term_ids)), dtype=np.float64)
+        if not weighting.normalize:
+            return q
+        norms = np.sqrt(np.asarray(q.multiply(q).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ q
+
+    def rank_many(self, queries, k=None, batch_size=MATRIX_BATCH):
+        """Skor semua query dengan perkalian matriks sparse per batch, top-k per query"""
+        # matriks skor dense berukuran batch x jumlah dokumen, bukan (semua query) x jumlah dokumen
+        queries = list(queries)
+        results = []
+        for start in range(0, len(queries), batch_size):
+            results.extend(self._rank_batch(queries[start:start + batch_size], k))
+        return results
+
+    def _rank_batch(self, queries, k):
+        scores = (self.query_matrix(queries) @ self.matrix.T).toarray()
+        n_docs = scores.shape[1]
+
+        results = []
+        for row in scores:
+            if k is not None and k <= 0:
+                cand = np.arange(0)
+            elif k is not None and k < n_docs:
+                cand = np.argpartition(-row, k - 1)[:k]
+            else:
+                cand = np.arange(n_docs)
+            # urut skor menurun, seri diurutkan sesuai urutan dokumen
+            order = cand[np.lexsort((cand, -row[cand]))]
+            results.append([(self.doc_ids[i], float(row[i])) for i in order])
+        return results
+
+
+_engines = {}
 
-    scores = {}
-    for doc_id, vec in tfidf.items():
-        scores[doc_id] = cosine_similarity(q_vec, vec)
+def get_engine(weighting=DEFAULT_WEIGHTING, index_path=INDEX_PATH, processed_dir=PROCESSED_DIR):
+    """Engine VSM bersama per proses; dimuat ulang hanya jika snapshot indeks aktif berganti"""
+    from query_analyzer import get_analyzer
 
-    # Urutkan berdasarkan skor tertinggi
-    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    key = (weighting, os.path.abspath(index_path))
+    engine = _engines.get(key)
+    if engine is None or engine.version != index_version(index_path):
+        engine = TfidfIndex.from_index_file(index_path, processed_dir, weighting)
+        _engines[key] = engine
+    # query dinormalisasi dengan pipeline dokumen lewat leksikon hasil indexing
+    engine.analyzer = get_analyzer(index_path)
+    return engine
 
 
 if __name__ == "__main__":